@@ -1,55 +1,94 @@
+import time
+_import_started = time.perf_counter()
+
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_cors import CORS
 from config import DevelopmentConfig, ProductionConfig, TestingConfig
+from .replicas import RoutingSession
+from .startup import StartupProfile
 import os
 
 # Initialize extensions
 login_manager = LoginManager()
-db = SQLAlchemy()
-
-def create_app(config_class=None):
-    app = Flask(__name__)
-
-    if config_class is not None:
-        app.config.from_object(config_class)
-        print(f"Running with custom config: {config_class.__name__}")
-    else:
-        # Load configuration based on environment
-        # Use FLASK_DEBUG for modern Flask versions (FLASK_ENV is deprecated)
-        flask_debug = os.getenv("FLASK_DEBUG", "0").lower() in ("1", "true", "yes")
-        flask_env = os.getenv("FLASK_ENV", "development").lower()
-        
-        if flask_env == "production" or (not flask_debug and flask_env != "development"):
-            app.config.from_object(ProductionConfig)
-            print("Running in PRODUCTION mode")
-        elif flask_env == "testing":
-            app.config.from_object(TestingConfig)
-            print("Running in TESTING mode")
-        else:
-            app.config.from_object(DevelopmentConfig)
-            print("Running in DEVELOPMENT mode")
-
-    # Init extensions
-    db.init_app(app)
-    login_manager.init_app(app)
-    login_manager.login_view = None  # disables redirect to login page
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
+_import_seconds = time.perf_counter() - _import_started
 
-    # Get frontend origin from config
-    frontend_origin = app.config.get("FRONTEND_ORIGIN", app.config.get("CORS_ORIGINS", "*"))
-    CORS(app, resources={r"/*": {"origins": frontend_origin}}, supports_credentials=True)
+def create_app(config_class=None):
+    profile = StartupProfile(_import_seconds)
 
+    with profile.phase('config'):
+        app = Flask(__name__)
 
-    # Import models and blueprints
-    from . import models
-    from .routes import auth_bp
-    from .jobs import jobs_bp
+        if config_class is not None:
+            app.config.from_object(config_class)
+            app.logger.info(f"Running with custom config: {config_class.__name__}")
+        else:
+            # Load configuration based on environment
+            # Use FLASK_DEBUG for modern Flask versions (FLASK_ENV is deprecated)
+            flask_debug = os.getenv("FLASK_DEBUG", "0").lower() in ("1", "true", "yes")
+            flask_env = os.getenv("FLASK_ENV", "development").lower()
+
+            if flask_env == "production" or (not flask_debug and flask_env != "development"):
+                app.config.from_object(ProductionConfig)
+                app.logger.info("Running in PRODUCTION mode")
+            elif flask_env == "testing":
+                app.config.from_object(TestingConfig)
+                app.logger.info("Running in TESTING mode")
+            else:
+                app.config.from_object(DevelopmentConfig)
+                app.logger.info("Running in DEVELOPMENT mode")
+
+        if app.config.get('JSON_FAST_PROVIDER'):
+            from .serializers import FastJSONProvider
+            app.json = FastJSONProvider(app)
 
-    # Register blueprints (CORS will apply globally via app)
-    app.register_blueprint(auth_bp)
-    app.register_blueprint(jobs_bp, url_prefix='/api/jobs')
+    # Init extensions
+    with profile.phase('extensions (sqlalchemy, login)'):
+        db.init_app(app)
+        login_manager.init_app(app)
+        login_manager.login_view = None  # disables redirect to login page
+
+    with profile.phase('app services'):
+        from .user_cache import init_user_cache
+        from .passwords import init_password_hasher
+        from .replicas import init_replicas
+        from .sharding import init_sharding
+        from .metrics import init_metrics
+        from .compression import init_compression
+        from .admission import init_admission
+        from .resumes import init_resume_storage
+        # Registered first so it runs last: after_request hooks run in reverse
+        init_compression(app)
+        init_user_cache(app)
+        init_password_hasher(app)
+        init_replicas(app)
+        init_sharding(app)
+        init_resume_storage(app)
+        init_metrics(app)
+        # After metrics, so shed requests still show up in the latency histogram
+        init_admission(app)
+
+    with profile.phase('cors'):
+        # Get frontend origin from config
+        frontend_origin = app.config.get("FRONTEND_ORIGIN", app.config.get("CORS_ORIGINS", "*"))
+        CORS(app, resources={r"/*": {"origins": frontend_origin}}, supports_credentials=True,
+             expose_headers=["X-Next-Cursor", "ETag", "Server-Timing"])
+
+    with profile.phase('blueprints'):
+        # Import models and blueprints
+        from . import models
+        from .routes import auth_bp
+        from .jobs import jobs_bp
+
+        # Register blueprints (CORS will apply globally via app)
+        app.register_blueprint(auth_bp)
+        app.register_blueprint(jobs_bp, url_prefix='/api/jobs')
+
+    with profile.phase('cli commands'):
+        _register_commands(app)
 
     # Error handlers
     @app.errorhandler(400)
@@ -72,5 +111,42 @@ def create_app(config_class=None):
     def unauthorized_callback():
         return {'error': 'Unauthorized'}, 401
 
+    if app.config.get('SCHEMA_CHECK_ON_STARTUP'):
+        with profile.phase('schema version check'):
+            from .schema import ensure_schema
+            with app.app_context():
+                ensure_schema()
+
+    app.extensions['startup_profile'] = profile
+    if app.config.get('STARTUP_PROFILE'):
+        profile.print_report()
+
     return app
 
+
+def _register_commands(app):
+    from .stats import rebuild_stats_command
+    from .search import rebuild_search_index_command
+    from .changes import compact_tombstones_command
+    from .schema import init_db_command
+    from .sharding import rebalance_shards_command
+    from .resumes import gc_resumes_command
+    app.cli.add_command(rebuild_stats_command)
+    app.cli.add_command(rebuild_search_index_command)
+    app.cli.add_command(compact_tombstones_command)
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(rebalance_shards_command)
+    app.cli.add_command(gc_resumes_command)
+
+
+def reset_after_fork(app):
+    """Give a freshly forked worker its own connection pools.
+
+    Called from gunicorn's post_fork when the app was preloaded in the
+    master. ``close=False`` leaves the parent's connections untouched.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    app.extensions['replica_router'].dispose(close=False)
+    app.extensions['shard_router'].dispose(close=False)
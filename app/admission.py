@@ -0,0 +1,132 @@
+import threading
+import time
+
+from flask import current_app, g, jsonify, request
+
+from .metrics import Counter, _gauge
+from .models import db
+
+
+def busy_response(retry_after=1):
+    response = jsonify({'error': 'Server busy, try again shortly'})
+    response.headers['Retry-After'] = str(retry_after)
+    return response, 503
+
+
+class AdmissionController:
+    """Per-process in-flight budgets plus a database pool wait signal.
+
+    Each route class has its own in-flight limit and its own tolerance for
+    slow pool checkouts, so expensive routes are shed before cheap reads.
+    The pool wait is a moving average of recent checkouts; it is ignored
+    once no checkout has happened for ``window`` seconds, so shedding
+    stops by itself when the pressure goes away.
+    """
+
+    def __init__(self, max_in_flight, max_pool_wait, window=2.0):
+        self.max_in_flight = max_in_flight
+        self.max_pool_wait = max_pool_wait
+        self.window = window
+        self.in_flight = {}
+        self._wait = 0.0
+        self._wait_at = None
+        self._lock = threading.Lock()
+        self.admitted = Counter('admission_admitted_total', 'Requests admitted by route class.')
+        self.shed = Counter('admission_shed_total', 'Requests rejected with 503 by route class and reason.')
+
+    def observe_checkout(self, seconds):
+        with self._lock:
+            self._wait = seconds if self._wait_at is None else 0.8 * self._wait + 0.2 * seconds
+            self._wait_at = time.monotonic()
+
+    def pool_wait(self):
+        if self._wait_at is None or time.monotonic() - self._wait_at > self.window:
+            return 0.0
+        return self._wait
+
+    def try_acquire(self, route_class):
+        """Reserve a slot; returns None if admitted, else the shed reason."""
+        limit = self.max_in_flight.get(route_class)
+        wait_limit = self.max_pool_wait.get(route_class)
+        with self._lock:
+            current = self.in_flight.get(route_class, 0)
+            if limit is not None and current >= limit:
+                reason = 'in_flight'
+            elif wait_limit is not None and self.pool_wait() > wait_limit:
+                reason = 'pool_wait'
+            else:
+                self.in_flight[route_class] = current + 1
+                reason = None
+        if reason is None:
+            self.admitted.inc(route_class=route_class)
+        else:
+            self.shed.inc(route_class=route_class, reason=reason)
+        return reason
+
+    def release(self, route_class):
+        with self._lock:
+            self.in_flight[route_class] -= 1
+
+    def collect(self):
+        lines = self.admitted.render() + self.shed.render()
+        lines += _gauge('admission_in_flight', 'Requests currently in flight by route class.',
+                        [({'route_class': k}, v) for k, v in sorted(self.in_flight.items())])
+        lines += _gauge('db_pool_checkout_wait_seconds', 'Recent average pool checkout wait.',
+                        [({}, self.pool_wait())])
+        return lines
+
+
+def _time_checkouts(engine, controller):
+    # Every Connection gets its DBAPI connection from engine.raw_connection(),
+    # so this measures the pool checkout (and connect, when the pool grows).
+    raw_connection = engine.raw_connection
+
+    def timed_raw_connection():
+        start = time.perf_counter()
+        try:
+            return raw_connection()
+        finally:
+            controller.observe_checkout(time.perf_counter() - start)
+
+    engine.raw_connection = timed_raw_connection
+
+
+def _admit():
+    if request.endpoint is None:
+        return None
+    route_class = current_app.config['ADMISSION_ROUTE_CLASSES'].get(request.endpoint, 'default')
+    if route_class is None:
+        return None
+    if current_app.extensions['admission'].try_acquire(route_class) is not None:
+        return busy_response(current_app.config.get('ADMISSION_RETRY_AFTER', 1))
+    g._admission_class = route_class
+    return None
+
+
+def _release(exc):
+    route_class = g.pop('_admission_class', None)
+    if route_class is not None:
+        current_app.extensions['admission'].release(route_class)
+
+
+def init_admission(app):
+    controller = AdmissionController(
+        max_in_flight=app.config.get('ADMISSION_MAX_IN_FLIGHT', {}),
+        max_pool_wait=app.config.get('ADMISSION_MAX_POOL_WAIT', {}),
+        window=app.config.get('ADMISSION_POOL_WAIT_WINDOW', 2.0),
+    )
+    app.extensions['admission'] = controller
+    if not app.config.get('ADMISSION_CONTROL'):
+        return controller
+    with app.app_context():
+        engines = list(db.engines.values())
+    engines += app.extensions['replica_router'].engines
+    engines += app.extensions['shard_router'].engines
+    for engine in engines:
+        _time_checkouts(engine, controller)
+    app.before_request(_admit)
+    app.teardown_request(_release)
+    metrics = app.extensions.get('metrics')
+    if metrics is not None:
+        metrics.collectors.append(controller.collect)
+    return controller
@@ -0,0 +1,132 @@
+from collections import Counter, defaultdict
+
+from sqlalchemy import delete, select, update
+
+from .models import db, JobApplication
+from .search import index_jobs, remove_jobs
+from .stats import add_job, apply_deltas
+from .validation import JobValidationError, job_update_values
+from .changes import record_tombstones
+from .resumes import release_references
+from .versioning import bump_user_version, utcnow
+
+
+class BatchError(ValueError):
+    """Raised when the batch request as a whole is malformed."""
+
+
+def _freeze(values):
+    return tuple(sorted(values.items()))
+
+
+def apply_batch(user_id, operations, max_operations):
+    """Apply a list of update/delete operations in one transaction.
+
+    Ownership is checked with a single ``id IN (...) AND user_id = ?`` query.
+    Updates that set the same values are grouped into one set-based UPDATE,
+    and all deletes become one DELETE, so the number of statements depends
+    on the number of distinct changes rather than on the number of rows.
+    Returns one result dict per operation, in request order.
+    """
+    if not isinstance(operations, list) or not operations:
+        raise BatchError('operations must be a non-empty list')
+    if len(operations) > max_operations:
+        raise BatchError(f'At most {max_operations} operations per batch')
+
+    results = [None] * len(operations)
+    planned = []
+    seen_ids = set()
+    for index, op in enumerate(operations):
+        result = {'index': index}
+        results[index] = result
+        if not isinstance(op, dict):
+            result.update(status='invalid', error='Operation must be an object')
+            continue
+        kind, job_id = op.get('op'), op.get('id')
+        result.update(op=kind, id=job_id)
+        if kind not in ('update', 'delete'):
+            result.update(status='invalid', error="op must be 'update' or 'delete'")
+            continue
+        if not isinstance(job_id, int) or isinstance(job_id, bool):
+            result.update(status='invalid', error='id must be an integer')
+            continue
+        if job_id in seen_ids:
+            result.update(status='invalid', error='Duplicate id in batch')
+            continue
+        values = None
+        if kind == 'update':
+            try:
+                values = job_update_values(op.get('fields'))
+            except JobValidationError as e:
+                result.update(status='invalid', error=str(e))
+                continue
+            if not values:
+                result.update(status='invalid', error='No updatable fields')
+                continue
+        seen_ids.add(job_id)
+        planned.append((index, kind, job_id, values))
+
+    if not planned:
+        return results
+
+    try:
+        # Bump first: the UPDATE locks the user row, so a concurrent write
+        # to the same jobs (which bumps too) commits before the rows below
+        # are read, and stat deltas, tombstones and resume references are
+        # based on what is actually there.
+        seq, now = bump_user_version(user_id), utcnow()
+        owned = {
+            row.id: (row.status, row.date_applied, row.resume_sha256)
+            for row in db.session.execute(
+                select(JobApplication.id, JobApplication.status, JobApplication.date_applied,
+                       JobApplication.resume_sha256)
+                .where(JobApplication.id.in_([p[2] for p in planned]),
+                       JobApplication.user_id == user_id)
+            )
+        }
+
+        update_groups = defaultdict(list)
+        delete_ids = []
+        deltas = Counter()
+        for index, kind, job_id, values in planned:
+            if job_id not in owned:
+                results[index]['status'] = 'not_found'
+                continue
+            old_status, old_date, _ = owned[job_id]
+            add_job(deltas, old_status, old_date, sign=-1)
+            if kind == 'delete':
+                delete_ids.append(job_id)
+            else:
+                update_groups[_freeze(values)].append(job_id)
+                add_job(deltas, values.get('status', old_status),
+                        values.get('date_applied', old_date))
+            results[index]['status'] = 'ok'
+
+        if not update_groups and not delete_ids:
+            # Nothing to change: don't leave a version bump behind
+            db.session.rollback()
+            return results
+
+        for frozen, ids in update_groups.items():
+            db.session.execute(
+                update(JobApplication)
+                .where(JobApplication.id.in_(ids), JobApplication.user_id == user_id)
+                .values(change_seq=seq, updated_at=now, **dict(frozen))
+                .execution_options(synchronize_session=False)
+            )
+        if delete_ids:
+            db.session.execute(
+                delete(JobApplication)
+                .where(JobApplication.id.in_(delete_ids), JobApplication.user_id == user_id)
+                .execution_options(synchronize_session=False)
+            )
+        index_jobs([job_id for ids in update_groups.values() for job_id in ids])
+        remove_jobs(delete_ids)
+        release_references([owned[job_id][2] for job_id in delete_ids])
+        record_tombstones(user_id, delete_ids, seq)
+        apply_deltas(user_id, deltas)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return results
@@ -0,0 +1,144 @@
+from datetime import timedelta
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import and_, delete, func, insert, or_, select, update
+
+from .models import db, JobApplication, JobTombstone, User
+from .serializers import JOB_FIELDS, job_columns, serialize_rows
+from .sharding import each_shard
+from .versioning import utcnow
+
+
+class CursorError(ValueError):
+    """Raised for a malformed change feed cursor."""
+
+
+class CursorExpired(Exception):
+    """Raised when tombstones needed by a cursor have been compacted."""
+
+
+def parse_cursor(raw):
+    """Parse ``since``: '<seq>' or '<seq>:<id>' as returned in ``cursor``."""
+    if raw in (None, ''):
+        return 0, 0
+    seq, _, last_id = str(raw).partition(':')
+    try:
+        seq, last_id = int(seq), int(last_id or 0)
+    except ValueError:
+        raise CursorError('Invalid since cursor')
+    if seq < 0 or last_id < 0:
+        raise CursorError('Invalid since cursor')
+    return seq, last_id
+
+
+def record_tombstones(user_id, job_ids, seq):
+    """Remember deleted jobs, in the caller's transaction."""
+    if not job_ids:
+        return
+    now = utcnow()
+    db.session.execute(insert(JobTombstone), [
+        {'user_id': user_id, 'job_id': job_id, 'change_seq': seq, 'deleted_at': now}
+        for job_id in job_ids
+    ])
+
+
+def _after(seq_col, id_col, seq, last_id):
+    return or_(seq_col > seq, and_(seq_col == seq, id_col > last_id))
+
+
+def get_changes(user_id, since, limit):
+    """Return up to ``limit`` changes after ``since`` in (change_seq, id) order.
+
+    Both the live rows and the tombstones are read with a keyset range on
+    their (user_id, change_seq, id) index, so a sync costs time proportional
+    to the number of changes returned. A zero ``since`` is a full snapshot
+    and never expires: the client has no rows that a missed delete could
+    leave behind.
+    """
+    seq, last_id = since
+    if seq > 0:
+        horizon = db.session.execute(
+            select(User.sync_horizon).where(User.id == user_id)
+        ).scalar_one_or_none() or 0
+        # A batch delete shares one change_seq and may span pages, so a
+        # cursor inside the horizon's sequence may have missed compacted
+        # tombstones after last_id too
+        if seq < horizon or (seq == horizon and last_id > 0):
+            raise CursorExpired()
+
+    live = db.session.execute(
+        select(*job_columns(JOB_FIELDS, extra=('change_seq', 'updated_at')))
+        .where(JobApplication.user_id == user_id,
+               _after(JobApplication.change_seq, JobApplication.id, seq, last_id))
+        .order_by(JobApplication.change_seq, JobApplication.id)
+        .limit(limit + 1)
+    ).all()
+    dead = db.session.execute(
+        select(JobTombstone.job_id, JobTombstone.change_seq)
+        .where(JobTombstone.user_id == user_id,
+               _after(JobTombstone.change_seq, JobTombstone.job_id, seq, last_id))
+        .order_by(JobTombstone.change_seq, JobTombstone.job_id)
+        .limit(limit + 1)
+    ).all()
+
+    merged = sorted(
+        [(row.change_seq, row.id, 'upsert', row) for row in live]
+        + [(row.change_seq, row.job_id, 'delete', row) for row in dead],
+        key=lambda item: (item[0], item[1]),
+    )
+    has_more = len(merged) > limit
+    merged = merged[:limit]
+
+    changes = []
+    for change_seq, job_id, op, row in merged:
+        if op == 'delete':
+            changes.append({'op': 'delete', 'id': job_id, 'change_seq': change_seq})
+        else:
+            job = serialize_rows([row], JOB_FIELDS)[0]
+            job['updated_at'] = row.updated_at.isoformat() if row.updated_at else None
+            changes.append({'op': 'upsert', 'job': job, 'change_seq': change_seq})
+    if merged:
+        cursor = f'{merged[-1][0]}:{merged[-1][1]}'
+    else:
+        cursor = f'{seq}:{last_id}'
+    return {'changes': changes, 'cursor': cursor, 'has_more': has_more}
+
+
+def compact_tombstones(retention):
+    """Delete tombstones older than ``retention`` (a timedelta).
+
+    Each affected user's sync_horizon is raised first so clients holding a
+    cursor from before the compaction are told to resync instead of silently
+    missing deletes. Returns the number of tombstones removed.
+    """
+    cutoff = utcnow() - retention
+    horizons = db.session.execute(
+        select(JobTombstone.user_id, func.max(JobTombstone.change_seq))
+        .where(JobTombstone.deleted_at < cutoff)
+        .group_by(JobTombstone.user_id)
+    ).all()
+    for user_id, max_seq in horizons:
+        db.session.execute(
+            update(User)
+            .where(User.id == user_id, User.sync_horizon < max_seq)
+            .values(sync_horizon=max_seq)
+        )
+    removed = db.session.execute(
+        delete(JobTombstone).where(JobTombstone.deleted_at < cutoff)
+    ).rowcount
+    db.session.commit()
+    return removed
+
+
+@click.command('compact-tombstones')
+@click.option('--days', type=int, default=None,
+              help='Retention in days (default: JOBS_TOMBSTONE_RETENTION_DAYS).')
+@with_appcontext
+def compact_tombstones_command(days):
+    """Remove change feed tombstones past the retention period."""
+    from flask import current_app
+    if days is None:
+        days = current_app.config['JOBS_TOMBSTONE_RETENTION_DAYS']
+    removed = sum(compact_tombstones(timedelta(days=days)) for _ in each_shard())
+    click.echo(f'Removed {removed} tombstone(s).')
@@ -0,0 +1,94 @@
+import zlib
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # optional, gzip/deflate are always available
+    brotli = None
+
+SKIP_STATUSES = (204, 206, 304)
+
+
+class _Compressor:
+    """Incremental encoder with the same interface for every coding."""
+
+    def __init__(self, coding, level):
+        if coding == 'br':
+            self._c = brotli.Compressor(quality=min(level, 11))
+            self._chunk = lambda data: self._c.process(data) + self._c.flush()
+            self._end = self._c.finish
+        else:
+            wbits = 31 if coding == 'gzip' else 15  # gzip header vs zlib ("deflate")
+            self._c = zlib.compressobj(level, zlib.DEFLATED, wbits)
+            self._chunk = lambda data: self._c.compress(data) + self._c.flush(zlib.Z_SYNC_FLUSH)
+            self._end = self._c.flush
+
+    def chunk(self, data):
+        return self._chunk(data)
+
+    def finish(self):
+        return self._end()
+
+
+def available_codings(app):
+    codings = app.config.get('COMPRESS_ALGORITHMS', ('br', 'gzip', 'deflate'))
+    return [c for c in codings if c != 'br' or brotli is not None]
+
+
+def _stream(iterable, compressor):
+    # Flush after every chunk so clients receive data as it is produced
+    try:
+        for data in iterable:
+            if isinstance(data, str):
+                data = data.encode()
+            if data:
+                out = compressor.chunk(data)
+                if out:
+                    yield out
+        yield compressor.finish()
+    finally:
+        if hasattr(iterable, 'close'):
+            iterable.close()
+
+
+def _weaken_etag(response):
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+
+def compress_response(response):
+    app = current_app
+    if (not app.config.get('COMPRESS_ENABLED', True)
+            or request.method == 'HEAD'
+            or response.status_code in SKIP_STATUSES or response.status_code < 200
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or 'no-transform' in response.headers.get('Cache-Control', '')):
+        return response
+    level = app.config.get('COMPRESS_LEVELS', {}).get(response.mimetype)
+    if level is None:
+        return response
+    coding = request.accept_encodings.best_match(available_codings(app))
+    if coding is None:
+        return response
+
+    response.vary.add('Accept-Encoding')
+    if response.is_streamed:
+        response.response = _stream(response.response, _Compressor(coding, level))
+        response.headers.pop('Content-Length', None)
+    else:
+        body = response.get_data()
+        if len(body) < app.config.get('COMPRESS_MIN_SIZE', 1024):
+            return response
+        compressor = _Compressor(coding, level)
+        response.set_data(compressor.chunk(body) + compressor.finish())
+    response.headers['Content-Encoding'] = coding
+    # The compressed bytes differ from the identity representation
+    _weaken_etag(response)
+    return response
+
+
+def init_compression(app):
+    app.after_request(compress_response)
@@ -0,0 +1,64 @@
+import csv
+import io
+
+from sqlalchemy import select
+
+from .models import db, JobApplication
+from .serializers import JOB_FIELDS as EXPORT_FIELDS, dumps_line
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def _iter_rows(user_id, chunk_size):
+    """Yield lists of row tuples, ``chunk_size`` at a time.
+
+    Selects plain columns (no ORM objects) with ``stream_results`` so
+    PostgreSQL uses a server-side cursor and SQLite fetches incrementally.
+    """
+    columns = [getattr(JobApplication, name) for name in EXPORT_FIELDS]
+    stmt = (
+        select(*columns)
+        .where(JobApplication.user_id == user_id)
+        .order_by(JobApplication.id)
+        .execution_options(stream_results=True, yield_per=chunk_size)
+    )
+    result = db.session.execute(stmt)
+    try:
+        for partition in result.partitions():
+            yield partition
+    finally:
+        result.close()
+
+
+def _cell(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def generate_csv(user_id, chunk_size):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    for rows in _iter_rows(user_id, chunk_size):
+        writer.writerows([_cell(v) for v in row] for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def generate_ndjson(user_id, chunk_size):
+    for rows in _iter_rows(user_id, chunk_size):
+        yield ''.join(
+            dumps_line(dict(zip(EXPORT_FIELDS, map(_cell, row)))) + '\n'
+            for row in rows
+        )
+
+
+def generate_export(fmt, user_id, chunk_size):
+    if fmt == 'csv':
+        return generate_csv(user_id, chunk_size)
+    return generate_ndjson(user_id, chunk_size)
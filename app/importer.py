@@ -0,0 +1,137 @@
+import csv
+import json
+from collections import Counter
+
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from .models import db, JobApplication
+from .search import index_jobs
+from .sharding import assign_job_ids
+from .stats import add_job, apply_deltas
+from .validation import JobValidationError, job_values
+from .versioning import bump_user_version, utcnow
+
+CSV_TYPES = ('text/csv', 'application/csv')
+NDJSON_TYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+
+
+class ImportFormatError(ValueError):
+    """Raised when the upload's format cannot be determined."""
+
+
+def detect_format(mimetype, explicit=None):
+    fmt = (explicit or '').lower()
+    if fmt in ('csv', 'ndjson'):
+        return fmt
+    if fmt:
+        raise ImportFormatError(f'Unsupported format: {explicit}')
+    if mimetype in CSV_TYPES:
+        return 'csv'
+    if mimetype in NDJSON_TYPES:
+        return 'ndjson'
+    raise ImportFormatError('Send text/csv or application/x-ndjson, or pass ?format=')
+
+
+def _iter_lines(stream):
+    """Decode a binary stream line by line without reading it all."""
+    first = True
+    for raw in iter(stream.readline, b''):
+        line = raw.decode('utf-8')
+        if first:
+            line = line.lstrip('\ufeff')
+            first = False
+        yield line
+
+
+def iter_csv(stream):
+    """Yield (line_number, row_dict_or_error) for a CSV body with a header row."""
+    reader = csv.DictReader(_iter_lines(stream))
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except (csv.Error, UnicodeDecodeError) as e:
+            yield reader.line_num, JobValidationError(f'Malformed CSV: {e}')
+            return
+        yield reader.line_num, row
+
+
+def iter_ndjson(stream):
+    """Yield (line_number, object_or_error) for a newline-delimited JSON body."""
+    lines = _iter_lines(stream)
+    line_num = 0
+    while True:
+        try:
+            line = next(lines)
+        except StopIteration:
+            return
+        except UnicodeDecodeError as e:
+            yield line_num + 1, JobValidationError(f'Invalid UTF-8: {e}')
+            return
+        line_num += 1
+        if not line.strip():
+            continue
+        try:
+            yield line_num, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_num, JobValidationError(f'Invalid JSON: {e.msg}')
+
+
+def import_jobs(stream, fmt, user_id, chunk_size, max_errors):
+    """Stream rows from ``stream`` into JobApplication in chunked inserts.
+
+    Each chunk is a single multi-row INSERT committed in its own transaction,
+    so a failing chunk only loses its own rows. Returns a report dict with
+    per-line errors (capped at ``max_errors``).
+    """
+    rows = iter_csv(stream) if fmt == 'csv' else iter_ndjson(stream)
+    report = {'imported': 0, 'failed': 0, 'errors': [], 'errors_truncated': False}
+
+    def record_error(line, message):
+        report['failed'] += 1
+        if len(report['errors']) < max_errors:
+            report['errors'].append({'line': line, 'error': message})
+        else:
+            report['errors_truncated'] = True
+
+    def flush(chunk):
+        if not chunk:
+            return
+        deltas = Counter()
+        for _, values in chunk:
+            add_job(deltas, values['status'], values['date_applied'])
+        try:
+            seq, now = bump_user_version(user_id), utcnow()
+            new_rows = [dict(values, change_seq=seq, updated_at=now) for _, values in chunk]
+            assign_job_ids(new_rows)
+            ids = db.session.scalars(
+                insert(JobApplication).returning(JobApplication.id), new_rows,
+            ).all()
+            index_jobs(ids)
+            apply_deltas(user_id, deltas)
+            db.session.commit()
+            report['imported'] += len(chunk)
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            for line, _ in chunk:
+                record_error(line, f'Database error: {e.__class__.__name__}')
+
+    chunk = []
+    for line, item in rows:
+        if isinstance(item, Exception):
+            record_error(line, str(item))
+            continue
+        try:
+            values = job_values(item)
+        except JobValidationError as e:
+            record_error(line, str(e))
+            continue
+        values['user_id'] = user_id
+        chunk.append((line, values))
+        if len(chunk) >= chunk_size:
+            flush(chunk)
+            chunk = []
+    flush(chunk)
+    return report
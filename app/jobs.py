@@ -1,64 +1,246 @@
-from flask import Blueprint, request, jsonify, abort
+from flask import Blueprint, request, jsonify, abort, current_app, Response, send_file, stream_with_context
 from flask_login import login_required, current_user
-from .models import db, JobApplication
-from datetime import datetime
+from .models import db, JobApplication, ResumeBlob
+from .pagination import PaginationError, paginate, parse_limit, parse_sort
+from .validation import JobValidationError, job_update_values, job_values, parse_date
+from .importer import ImportFormatError, detect_format, import_jobs
+from .exporter import EXPORT_FORMATS, generate_export
+from .stats import get_stats, record_change
+from .versioning import bump_user_version, conditional_get, utcnow
+from .changes import CursorError, CursorExpired, get_changes, parse_cursor, record_tombstones
+from .batch import BatchError, apply_batch
+from .search import SearchError, index_jobs, remove_jobs, search_jobs, suggest
+from .replicas import read_only
+from .serializers import FieldsError, job_columns, parse_fields, serialize_rows
+from .resumes import (DIGEST_RE, ResumeError, ResumeTooLarge, add_reference,
+                      get_resume_storage, release_references)
 from flask_cors import cross_origin
 jobs_bp = Blueprint('jobs', __name__)
 
+def _filtered_jobs_query(args):
+    query = JobApplication.query.filter_by(user_id=current_user.id)
+    statuses = [s for s in args.get('status', '').split(',') if s]
+    if len(statuses) == 1:
+        query = query.filter(JobApplication.status == statuses[0])
+    elif statuses:
+        query = query.filter(JobApplication.status.in_(statuses))
+    if args.get('company'):
+        query = query.filter(JobApplication.company == args['company'])
+    if args.get('date_from'):
+        query = query.filter(JobApplication.date_applied >= parse_date(args['date_from']))
+    if args.get('date_to'):
+        query = query.filter(JobApplication.date_applied <= parse_date(args['date_to']))
+    return query
+
 @jobs_bp.route('/', methods=['GET'])
+@read_only
 @login_required
+@conditional_get('jobs')
 def get_jobs():
     try:
-        jobs = JobApplication.query.filter_by(user_id=current_user.id).all()
-        return jsonify([{
-            'id': job.id,
-            'company': job.company,
-            'position': job.position,
-            'resume_used': job.resume_used,
-            'date_applied': job.date_applied.isoformat() if job.date_applied else None,
-            'status': job.status
-        } for job in jobs])
+        sort, descending = parse_sort(request.args.get('sort'))
+        limit = parse_limit(
+            request.args.get('limit'),
+            current_app.config.get('JOBS_DEFAULT_PAGE_SIZE'),
+            current_app.config.get('JOBS_MAX_PAGE_SIZE', 500),
+        )
+        fields = parse_fields(request.args.get('fields'))
+        # Column-only query: rows are plain tuples, never ORM objects
+        query = _filtered_jobs_query(request.args).with_entities(
+            *job_columns(fields, extra=('id', sort)))
+    except (PaginationError, FieldsError, JobValidationError) as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        jobs, next_cursor = paginate(query, sort, descending, limit, request.args.get('cursor'))
+        response = jsonify(serialize_rows(jobs, fields))
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to fetch jobs', 'details': str(e)}), 500
 
+@jobs_bp.route('/export', methods=['GET'])
+@read_only
+@login_required
+def export_jobs():
+    fmt = request.args.get('format', 'csv').lower()
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f'Unsupported format: {fmt}'}), 400
+    chunk_size = current_app.config['JOBS_EXPORT_CHUNK_SIZE']
+    response = Response(
+        stream_with_context(generate_export(fmt, current_user.id, chunk_size)),
+        mimetype=EXPORT_FORMATS[fmt],
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename=jobs.{fmt}'
+    return response
+
+@jobs_bp.route('/changes', methods=['GET'])
+@read_only
+@login_required
+@conditional_get('changes')
+def job_changes():
+    try:
+        since = parse_cursor(request.args.get('since'))
+        limit = parse_limit(request.args.get('limit'), 500, current_app.config.get('JOBS_MAX_PAGE_SIZE', 500))
+    except (CursorError, PaginationError) as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        return jsonify(get_changes(current_user.id, since, limit))
+    except CursorExpired:
+        # Restart from an empty cursor: a full snapshot never expires
+        return jsonify({'error': 'Cursor expired, full resync required', 'reset': True,
+                        'cursor': '0'}), 410
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch changes', 'details': str(e)}), 500
+
+@jobs_bp.route('/stats', methods=['GET'])
+@read_only
+@login_required
+@conditional_get('stats')
+def job_stats():
+    try:
+        return jsonify(get_stats(current_user.id))
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch stats', 'details': str(e)}), 500
+
+@jobs_bp.route('/search', methods=['GET'])
+@read_only
+@login_required
+@conditional_get('search')
+def search():
+    try:
+        limit = parse_limit(request.args.get('limit'), 20, current_app.config.get('JOBS_MAX_PAGE_SIZE', 500))
+        fields = parse_fields(request.args.get('fields'))
+        offset = int(request.args.get('offset', 0))
+        if offset < 0:
+            raise ValueError
+        if offset > current_app.config['JOBS_SEARCH_MAX_OFFSET']:
+            return jsonify({'error': 'offset too large, refine the query'}), 400
+    except (PaginationError, FieldsError) as e:
+        return jsonify({'error': str(e)}), 400
+    except ValueError:
+        return jsonify({'error': 'offset must be a non-negative integer'}), 400
+    try:
+        hits = search_jobs(current_user.id, request.args.get('q'), limit + 1, offset)
+    except SearchError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        has_more = len(hits) > limit
+        hits = hits[:limit]
+        ranks = dict(hits)
+        rows = db.session.execute(
+            db.select(*job_columns(fields, extra=('id',))).where(
+                JobApplication.id.in_(list(ranks)), JobApplication.user_id == current_user.id
+            )
+        )
+        jobs = {row.id: row for row in rows}
+        ordered = [jobs[job_id] for job_id, _ in hits if job_id in jobs]
+        results = serialize_rows(ordered, fields)
+        for result, row in zip(results, ordered):
+            result['rank'] = ranks[row.id]
+        return jsonify({
+            'results': results,
+            'next_offset': offset + limit if has_more else None
+        })
+    except Exception as e:
+        return jsonify({'error': 'Search failed', 'details': str(e)}), 500
+
+@jobs_bp.route('/search/suggest', methods=['GET'])
+@read_only
+@login_required
+def search_suggest():
+    try:
+        limit = parse_limit(request.args.get('limit'), 10, 50)
+        values = suggest(current_user.id, request.args.get('field', 'company'),
+                         request.args.get('q', ''), limit)
+    except (PaginationError, SearchError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': 'Suggest failed', 'details': str(e)}), 500
+    return jsonify([{'value': value, 'count': count} for value, count in values])
+
 @jobs_bp.route('/', methods=['POST'])
 @login_required
 def create_job():
     data = request.get_json()
     try:
-        job = JobApplication(
-            company=data['company'],
-            position=data['position'],
-            resume_used=data.get('resume_used'),
-            date_applied=datetime.strptime(data['date_applied'], '%Y-%m-%d').date() if data.get('date_applied') else None,
-            status=data.get('status', 'applied'),
-            user_id=current_user.id
-        )
+        values = job_values(data)
+        seq = bump_user_version(current_user.id)
+        job = JobApplication(user_id=current_user.id, change_seq=seq, updated_at=utcnow(), **values)
         db.session.add(job)
+        db.session.flush()
+        index_jobs([job.id])
+        record_change(current_user.id, new=(job.status, job.date_applied))
         db.session.commit()
         return jsonify({'message': 'Job created', 'id': job.id}), 201
-    except KeyError as e:
-        return jsonify({'error': f'Missing field: {e.args[0]}'}), 400
+    except JobValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to create job', 'details': str(e)}), 500
 
+@jobs_bp.route('/import', methods=['POST'])
+@login_required
+def import_jobs_route():
+    try:
+        fmt = detect_format(request.mimetype, request.args.get('format'))
+        chunk_size = int(request.args.get('chunk_size', current_app.config['JOBS_IMPORT_CHUNK_SIZE']))
+        if chunk_size < 1:
+            raise ValueError
+    except ImportFormatError as e:
+        return jsonify({'error': str(e)}), 400
+    except ValueError:
+        return jsonify({'error': 'chunk_size must be a positive integer'}), 400
+    chunk_size = min(chunk_size, current_app.config['JOBS_IMPORT_MAX_CHUNK_SIZE'])
+    try:
+        report = import_jobs(
+            request.stream, fmt, current_user.id, chunk_size,
+            current_app.config['JOBS_IMPORT_MAX_ERRORS'],
+        )
+        return jsonify(report)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to import jobs', 'details': str(e)}), 500
+
+@jobs_bp.route('/batch', methods=['POST'])
+@login_required
+def batch_jobs():
+    data = request.get_json(silent=True) or {}
+    try:
+        results = apply_batch(
+            current_user.id, data.get('operations'),
+            current_app.config['JOBS_BATCH_MAX_OPERATIONS'],
+        )
+        return jsonify({'results': results})
+    except BatchError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to apply batch', 'details': str(e)}), 500
+
 @jobs_bp.route('/<int:id>', methods=['PUT'])
 @login_required
 def update_job(id):
     try:
-        job = JobApplication.query.filter_by(id=id, user_id=current_user.id).first()
+        # Locked until commit: the old values below feed the stat deltas
+        job = JobApplication.query.filter_by(id=id, user_id=current_user.id).with_for_update().first()
         if not job:
             return jsonify({'error': 'Job not found'}), 404
+        old = (job.status, job.date_applied)
         data = request.get_json()
-        for field in ['company', 'position', 'resume_used', 'date_applied', 'status']:
-            if field in data:
-                if field == 'date_applied' and data[field]:
-                    setattr(job, field, datetime.strptime(data[field], '%Y-%m-%d').date())
-                else:
-                    setattr(job, field, data[field])
+        for field, value in job_update_values(data).items():
+            setattr(job, field, value)
+        job.change_seq = bump_user_version(current_user.id)
+        job.updated_at = utcnow()
+        index_jobs([job.id])
+        record_change(current_user.id, old=old, new=(job.status, job.date_applied))
         db.session.commit()
         return jsonify({'message': 'Job updated'})
+    except JobValidationError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to update job', 'details': str(e)}), 500
@@ -67,12 +249,107 @@ def update_job(id):
 @login_required
 def delete_job(id):
     try:
-        job = JobApplication.query.filter_by(id=id, user_id=current_user.id).first()
+        job = JobApplication.query.filter_by(id=id, user_id=current_user.id).with_for_update().first()
         if not job:
             return jsonify({'error': 'Job not found'}), 404
         db.session.delete(job)
+        remove_jobs([job.id])
+        release_references([job.resume_sha256])
+        record_change(current_user.id, old=(job.status, job.date_applied))
+        record_tombstones(current_user.id, [job.id], bump_user_version(current_user.id))
         db.session.commit()
         return jsonify({'message': 'Job deleted'})
     except Exception as e:
         db.session.rollback()
-        return jsonify({'error': 'Failed to delete job', 'details': str(e)}), 500 
\ No newline at end of file
+        return jsonify({'error': 'Failed to delete job', 'details': str(e)}), 500 
+
+@jobs_bp.route('/<int:id>/resume', methods=['PUT'])
+@login_required
+def upload_resume(id):
+    """Attach a resume: stream the file as the body, or send
+    ``{"sha256": ...}`` to reuse a file already attached to another job."""
+    job = JobApplication.query.filter_by(id=id, user_id=current_user.id).first()
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    try:
+        if request.is_json:
+            digest = (request.get_json(silent=True) or {}).get('sha256')
+            if not isinstance(digest, str) or not DIGEST_RE.match(digest):
+                return jsonify({'error': 'sha256 must be a hex SHA-256 digest'}), 400
+            # Only files this user already attached can be reused by digest
+            owned = db.session.scalar(
+                db.select(JobApplication.id)
+                .where(JobApplication.user_id == current_user.id,
+                       JobApplication.resume_sha256 == digest).limit(1)
+            )
+            blob = db.session.get(ResumeBlob, digest) if owned else None
+            if blob is None:
+                return jsonify({'error': 'Resume not found'}), 404
+            size, content_type = blob.size, blob.content_type
+        else:
+            content_type = request.mimetype
+            if content_type not in current_app.config['RESUME_CONTENT_TYPES']:
+                return jsonify({'error': f'Unsupported resume type: {content_type or "none"}'}), 415
+            digest, size = get_resume_storage().save(
+                request.stream, current_app.config['RESUME_MAX_BYTES'])
+        # Re-read the attached digest under a row lock (not held during the
+        # upload) so concurrent requests never release the same reference twice
+        job = (JobApplication.query.filter_by(id=id, user_id=current_user.id)
+               .with_for_update().populate_existing().first())
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        if job.resume_sha256 != digest:
+            add_reference(digest, size, content_type)
+            release_references([job.resume_sha256])
+            job.resume_sha256 = digest
+            job.change_seq = bump_user_version(current_user.id)
+            job.updated_at = utcnow()
+        db.session.commit()
+        return jsonify({'sha256': digest, 'size': size, 'content_type': content_type})
+    except ResumeTooLarge as e:
+        return jsonify({'error': str(e)}), 413
+    except ResumeError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to store resume', 'details': str(e)}), 500
+
+@jobs_bp.route('/<int:id>/resume', methods=['GET'])
+@read_only
+@login_required
+def download_resume(id):
+    """Serve the attached file; send_file handles ETag/Range and hands the
+    open file to the server's sendfile support (or X-Sendfile)."""
+    job = JobApplication.query.filter_by(id=id, user_id=current_user.id).first()
+    blob = db.session.get(ResumeBlob, job.resume_sha256) if job and job.resume_sha256 else None
+    if blob is None:
+        return jsonify({'error': 'Resume not found'}), 404
+    try:
+        response = send_file(
+            get_resume_storage().path(blob.sha256),
+            mimetype=blob.content_type,
+            download_name=job.resume_used or f'resume-{job.id}',
+            etag=blob.sha256,
+            conditional=True,
+        )
+    except FileNotFoundError:
+        return jsonify({'error': 'Resume not found'}), 404
+    response.cache_control.private = True
+    return response
+
+@jobs_bp.route('/<int:id>/resume', methods=['DELETE'])
+@login_required
+def delete_resume(id):
+    try:
+        job = JobApplication.query.filter_by(id=id, user_id=current_user.id).with_for_update().first()
+        if not job or not job.resume_sha256:
+            return jsonify({'error': 'Resume not found'}), 404
+        release_references([job.resume_sha256])
+        job.resume_sha256 = None
+        job.change_seq = bump_user_version(current_user.id)
+        job.updated_at = utcnow()
+        db.session.commit()
+        return jsonify({'message': 'Resume removed'})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to remove resume', 'details': str(e)}), 500
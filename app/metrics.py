@@ -0,0 +1,219 @@
+import hmac
+import threading
+import time
+
+from flask import Blueprint, Response, abort, current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+metrics_bp = Blueprint('metrics', __name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in labels) + '}'
+
+
+class Histogram:
+    def __init__(self, name, help, buckets):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                for bound, n in zip(self.buckets, counts):
+                    lines.append(f'{self.name}_bucket{_labels(key + (("le", bound),))} {n}')
+                lines.append(f'{self.name}_bucket{_labels(key + (("le", "+Inf"),))} {count}')
+                lines.append(f'{self.name}_sum{_labels(key)} {total}')
+                lines.append(f'{self.name}_count{_labels(key)} {count}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._series.get(tuple(sorted(labels.items())), 0)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for key, value in sorted(self._series.items()):
+                lines.append(f'{self.name}{_labels(key)} {value}')
+        return lines
+
+
+def _gauge(name, help, samples):
+    lines = [f'# HELP {name} {help}', f'# TYPE {name} gauge']
+    lines.extend(f'{name}{_labels(tuple(sorted(labels.items())))} {value}' for labels, value in samples)
+    return lines
+
+
+class Metrics:
+    """Per-process request and SQL metrics."""
+
+    def __init__(self):
+        self.request_latency = Histogram(
+            'http_request_duration_seconds', 'Request latency by endpoint.', LATENCY_BUCKETS)
+        self.request_queries = Histogram(
+            'db_queries_per_request', 'SQL statements executed per request.', QUERY_COUNT_BUCKETS)
+        self.request_sql_time = Histogram(
+            'db_time_per_request_seconds', 'Total SQL time per request.', LATENCY_BUCKETS)
+        self.slow_queries = Counter('db_slow_queries_total', 'Statements slower than the threshold.')
+        self.collectors = []
+
+    def render(self):
+        lines = []
+        for metric in (self.request_latency, self.request_queries,
+                       self.request_sql_time, self.slow_queries):
+            lines.extend(metric.render())
+        for collect in self.collectors:
+            lines.extend(collect())
+        return '\n'.join(lines) + '\n'
+
+
+class QueryCounter:
+    """Context manager counting SQL statements executed on any engine."""
+
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(Engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(Engine, 'before_cursor_execute', self._record)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start'].pop()
+    if not has_request_context() or '_sql_stats' not in g:
+        return
+    stats = g._sql_stats
+    stats[0] += 1
+    stats[1] += elapsed
+    threshold = current_app.config.get('SQL_SLOW_QUERY_SECONDS')
+    if threshold is not None and elapsed >= threshold:
+        current_app.extensions['metrics'].slow_queries.inc(endpoint=request.endpoint or 'unmatched')
+        current_app.logger.warning('Slow SQL (%.1f ms): %s', elapsed * 1000, statement[:500])
+
+
+def _start_timer():
+    g._request_start = time.perf_counter()
+    g._sql_stats = [0, 0.0]
+
+
+def _record_request(response):
+    if '_request_start' not in g:
+        return response
+    elapsed = time.perf_counter() - g._request_start
+    queries, sql_time = g._sql_stats
+    endpoint = request.endpoint or 'unmatched'
+    metrics = current_app.extensions['metrics']
+    metrics.request_latency.observe(elapsed, endpoint=endpoint, method=request.method,
+                                    status=response.status_code)
+    metrics.request_queries.observe(queries, endpoint=endpoint)
+    metrics.request_sql_time.observe(sql_time, endpoint=endpoint)
+    if current_app.config.get('METRICS_SERVER_TIMING'):
+        response.headers.add(
+            'Server-Timing',
+            f'app;dur={elapsed * 1000:.1f}, db;dur={sql_time * 1000:.1f};desc="{queries} queries"',
+        )
+    return response
+
+
+def _collect_app_stats(app):
+    def collect():
+        lines = []
+        cache = app.extensions.get('user_cache')
+        if cache is not None:
+            stats = cache.stats()
+            lines += _gauge('user_cache_events', 'User loader cache size and lookups.',
+                            [({'kind': k}, v) for k, v in stats.items()])
+        router = app.extensions.get('replica_router')
+        if router is not None and router.engines:
+            lines += _gauge('db_replica_routing', 'Reads routed to replicas and fallbacks.',
+                            [({'kind': 'replica_reads'}, router.replica_reads),
+                             ({'kind': 'fallbacks'}, router.fallbacks)])
+        hasher = app.extensions.get('password_hasher')
+        if hasher is not None:
+            snapshot = hasher.metrics()
+            lines += ['# HELP password_hash_duration_seconds Password hash/verify latency.',
+                      '# TYPE password_hash_duration_seconds histogram']
+            for op in ('hash', 'verify'):
+                cumulative = 0
+                for bound, n in zip(snapshot['buckets'], snapshot[op]['buckets']):
+                    cumulative += n
+                    lines.append(f'password_hash_duration_seconds_bucket{{op="{op}",le="{bound}"}} {cumulative}')
+                lines.append(f'password_hash_duration_seconds_bucket{{op="{op}",le="+Inf"}} {snapshot[op]["count"]}')
+                lines.append(f'password_hash_duration_seconds_sum{{op="{op}"}} {snapshot[op]["sum"]}')
+                lines.append(f'password_hash_duration_seconds_count{{op="{op}"}} {snapshot[op]["count"]}')
+            lines += _gauge('password_hash_rejected', 'Hash operations rejected by the queue limit.',
+                            [({}, snapshot['rejected'])])
+        return lines
+    return collect
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    token = current_app.config.get('METRICS_TOKEN')
+    if not token and current_app.config.get('METRICS_REQUIRE_TOKEN'):
+        abort(404)
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        abort(401)
+    body = current_app.extensions['metrics'].render()
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
+
+def init_metrics(app):
+    metrics = Metrics()
+    metrics.collectors.append(_collect_app_stats(app))
+    app.extensions['metrics'] = metrics
+    app.before_request(_start_timer)
+    app.after_request(_record_request)
+    app.register_blueprint(metrics_bp)
+    return metrics
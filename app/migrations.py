@@ -0,0 +1,98 @@
+"""Ordered schema migrations for databases created by earlier releases.
+
+``db.create_all()`` only creates missing tables, so every column or index
+added to an existing table needs a step here. Steps run in order inside one
+transaction on the primary and must be idempotent: each checks what is
+already there, so a database created by ``create_all`` at any point (with
+no recorded version) can run them all safely.
+"""
+from collections import Counter
+
+import sqlalchemy as sa
+
+from .models import JobApplication, JobStat
+from .search import backend_for
+from .stats import add_job
+
+
+def _add_column(connection, table, name, ddl):
+    existing = {c['name'] for c in sa.inspect(connection).get_columns(table)}
+    if name not in existing:
+        connection.exec_driver_sql(f'ALTER TABLE "{table}" ADD COLUMN {name} {ddl}')
+
+
+def _create_indexes(connection, table, names):
+    for index in table.indexes:
+        if index.name in names:
+            index.create(connection, checkfirst=True)
+
+
+def _job_list_indexes(connection):
+    _create_indexes(connection, JobApplication.__table__,
+                    {'ix_job_user_date_id', 'ix_job_user_company_id', 'ix_job_user_status'})
+
+
+def _backfill_job_stats(connection):
+    jobs, stats = JobApplication.__table__, JobStat.__table__
+    per_user = {}
+    for uid, status, date_applied, n in connection.execute(
+        sa.select(jobs.c.user_id, jobs.c.status, jobs.c.date_applied, sa.func.count())
+        .group_by(jobs.c.user_id, jobs.c.status, jobs.c.date_applied)
+    ):
+        add_job(per_user.setdefault(uid, Counter()), status, date_applied, sign=n)
+    connection.execute(sa.delete(stats))
+    rows = [
+        {'user_id': uid, 'kind': kind, 'bucket': bucket, 'count': n}
+        for uid, deltas in per_user.items()
+        for (kind, bucket), n in deltas.items() if n
+    ]
+    if rows:
+        connection.execute(sa.insert(stats), rows)
+
+
+def _user_versioning(connection):
+    _add_column(connection, 'user', 'data_version', 'INTEGER NOT NULL DEFAULT 0')
+    _add_column(connection, 'user', 'updated_at', 'TIMESTAMP')
+
+
+def _search_index(connection):
+    backend = backend_for(connection.dialect.name)
+    backend.create(connection)
+    backend.populate(connection)
+
+
+def _change_feed(connection):
+    _add_column(connection, 'user', 'sync_horizon', 'INTEGER NOT NULL DEFAULT 0')
+    _add_column(connection, 'job_application', 'change_seq', 'INTEGER NOT NULL DEFAULT 0')
+    _add_column(connection, 'job_application', 'updated_at', 'TIMESTAMP')
+    _create_indexes(connection, JobApplication.__table__, {'ix_job_user_change_seq'})
+
+
+def _resume_files(connection):
+    _add_column(connection, 'job_application', 'resume_sha256', 'VARCHAR(64)')
+
+
+def _job_id_index(connection):
+    _create_indexes(connection, JobApplication.__table__, {'ix_job_user_id'})
+
+
+# (version, step). Append only; never renumber or edit a released step.
+MIGRATIONS = [
+    (1, _job_list_indexes),
+    (2, _backfill_job_stats),
+    (3, _user_versioning),
+    (4, _search_index),
+    (5, _change_feed),
+    (6, _resume_files),
+    (7, _job_id_index),
+]
+
+
+def migrate(connection, from_version):
+    """Run every step newer than ``from_version``; returns the versions run."""
+    applied = []
+    for version, step in MIGRATIONS:
+        if version > (from_version or 0):
+            step(connection)
+            applied.append(version)
+    return applied
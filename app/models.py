@@ -5,9 +5,27 @@ class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(150), unique=True, nullable=False)
     email = db.Column(db.String(150), unique=True, nullable=False)
-    password = db.Column(db.String(256), nullable=False) 
+    password = db.Column(db.String(256), nullable=False)
+    # Bumped on every change to the user's data; drives ETag/Last-Modified
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    updated_at = db.Column(db.DateTime, nullable=True)
+    # Highest change_seq whose tombstones were compacted away; change feed
+    # cursors below it can no longer be served and must resync
+    sync_horizon = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
 class JobApplication(db.Model):
+    # Composite indexes back the keyset-paginated, filtered list endpoint so
+    # that every page is a bounded index range scan regardless of depth.
+    # Plain ascending indexes: list queries never order over NULLs (see
+    # pagination.segments), so no NULLS FIRST/LAST placement is needed.
+    __table_args__ = (
+        db.Index('ix_job_user_id', 'user_id', 'id'),
+        db.Index('ix_job_user_date_id', 'user_id', 'date_applied', 'id'),
+        db.Index('ix_job_user_company_id', 'user_id', 'company', 'id'),
+        db.Index('ix_job_user_status', 'user_id', 'status'),
+        db.Index('ix_job_user_change_seq', 'user_id', 'change_seq', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     company = db.Column(db.String(150), nullable=False)
     position = db.Column(db.String(150), nullable=False)
@@ -15,4 +33,44 @@ class JobApplication(db.Model):
     date_applied = db.Column(db.Date)
     status = db.Column(db.String(50))  # e.g., applied, waiting, rejected, interview, hired
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    user = db.relationship('User', backref=db.backref('job_applications', lazy=True)) 
\ No newline at end of file
+    # Stamped with the user's data_version on every write (see change feed)
+    change_seq = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    updated_at = db.Column(db.DateTime, nullable=True)
+    # Attached resume file (ResumeBlob.sha256); no FK as jobs may be sharded
+    resume_sha256 = db.Column(db.String(64), nullable=True)
+    user = db.relationship('User', backref=db.backref('job_applications', lazy=True))
+
+class JobStat(db.Model):
+    """Per-user counter maintained alongside JobApplication writes.
+
+    ``kind`` is one of 'status', 'week' or 'month' and ``bucket`` the status
+    name, ISO week ('2024-W05') or month ('2024-02') being counted.
+    """
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    kind = db.Column(db.String(16), primary_key=True)
+    bucket = db.Column(db.String(64), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+class JobTombstone(db.Model):
+    """Record of a deleted JobApplication, kept for the change feed."""
+    __table_args__ = (
+        db.Index('ix_tombstone_user_change_seq', 'user_id', 'change_seq', 'job_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    job_id = db.Column(db.Integer, nullable=False)
+    change_seq = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, index=True)
+
+class ResumeBlob(db.Model):
+    """A stored resume file, kept once per distinct content.
+
+    ``ref_count`` is the number of job applications attaching it; blobs at
+    zero are removed by ``flask gc-resumes`` after a grace period.
+    """
+    sha256 = db.Column(db.String(64), primary_key=True)
+    size = db.Column(db.BigInteger, nullable=False)
+    content_type = db.Column(db.String(100), nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False)
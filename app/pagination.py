@@ -0,0 +1,160 @@
+import base64
+import json
+from datetime import date
+
+from sqlalchemy import tuple_
+
+from .models import JobApplication
+
+
+class PaginationError(ValueError):
+    """Raised when a list query has an invalid limit, sort or cursor."""
+
+
+# Sort name -> (column, nullable). Every sort is tie-broken on id so that
+# the ordering is total and a cursor always points at exactly one row.
+SORT_COLUMNS = {
+    'id': (JobApplication.id, False),
+    'date_applied': (JobApplication.date_applied, True),
+    'company': (JobApplication.company, False),
+}
+
+DEFAULT_SORT = 'id'
+
+
+def parse_sort(raw):
+    """Turn 'date_applied' / '-date_applied' into (name, descending)."""
+    raw = (raw or DEFAULT_SORT).strip()
+    descending = raw.startswith('-')
+    name = raw.lstrip('-')
+    if name not in SORT_COLUMNS:
+        raise PaginationError(f'Invalid sort: {raw}')
+    return name, descending
+
+
+def parse_limit(raw, default, maximum):
+    if raw in (None, ''):
+        return default
+    try:
+        limit = int(raw)
+    except (TypeError, ValueError):
+        raise PaginationError('limit must be an integer')
+    if limit < 1:
+        raise PaginationError('limit must be positive')
+    return min(limit, maximum)
+
+
+def _encode_value(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def _decode_value(name, value):
+    """Check a cursor value against the sort column's type (cursors are
+    client-supplied, so anything else must not reach the query)."""
+    _, nullable = SORT_COLUMNS[name]
+    if value is None and nullable:
+        return None
+    if name == 'date_applied':
+        return date.fromisoformat(value)
+    if name == 'company' and isinstance(value, str):
+        return value
+    if name == 'id' and isinstance(value, int) and not isinstance(value, bool):
+        return value
+    raise ValueError(f'Invalid cursor value for {name}')
+
+
+def encode_cursor(sort, descending, row):
+    """Build an opaque cursor pointing just after ``row``."""
+    column, _ = SORT_COLUMNS[sort]
+    value = getattr(row, column.key)
+    payload = [('-' if descending else '') + sort, _encode_value(value), row.id]
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, sort, descending):
+    """Return the (value, id) pair encoded in ``cursor``."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        cursor_sort, value, last_id = json.loads(base64.urlsafe_b64decode(padded))
+        value = _decode_value(sort, value)
+        if not isinstance(last_id, int) or isinstance(last_id, bool):
+            raise ValueError('Invalid cursor id')
+    except Exception:
+        raise PaginationError('Invalid cursor')
+    if cursor_sort != ('-' if descending else '') + sort:
+        raise PaginationError('Cursor does not match sort order')
+    return value, last_id
+
+
+def _range(sort, descending, value, last_id):
+    """Row-value range strictly after (value, last_id), or None without a cursor."""
+    if last_id is None:
+        return None
+    column, _ = SORT_COLUMNS[sort]
+    if sort == 'id':
+        left, right = column, last_id
+    else:
+        left, right = tuple_(column, JobApplication.id), tuple_(value, last_id)
+    return left < right if descending else left > right
+
+
+def segments(sort, descending, value=None, last_id=None):
+    """Return the ``(where, order_by)`` pieces that make up one listing.
+
+    NULLs sort first ascending and last descending. Instead of ordering
+    over NULLs (which only matches an index whose NULL placement agrees,
+    and turns a cursor into an OR that cannot seek), a nullable sort is
+    split into its NULL and non-NULL ranges. Each range is a plain seek on
+    ``(user_id, <column>, id)`` in ascending or descending index order, with
+    no NULLS FIRST/LAST clause for the index to match.
+    """
+    column, nullable = SORT_COLUMNS[sort]
+    id_col = JobApplication.id
+    direction = (lambda c: c.desc()) if descending else (lambda c: c.asc())
+    keys = [direction(column)] if sort == 'id' else [direction(column), direction(id_col)]
+    after = _range(sort, descending, value, last_id)
+    if not nullable:
+        return [([] if after is None else [after], keys)]
+    if last_id is None:
+        null_part = [column.is_(None)]
+        value_part = [column.isnot(None)]
+    elif value is None:
+        null_part = [column.is_(None), id_col < last_id if descending else id_col > last_id]
+        # Ascending, the non-NULL range is still ahead; descending, it is done
+        value_part = None if descending else [column.isnot(None)]
+    else:
+        # A row value comparison is never true for a NULL column
+        null_part = [column.is_(None)] if descending else None
+        value_part = [after]
+    parts = [(value_part, keys), (null_part, [direction(id_col)])]
+    if not descending:
+        parts.reverse()
+    return [(where, keys) for where, keys in parts if where is not None]
+
+
+def paginate(query, sort, descending, limit, cursor=None):
+    """Apply keyset pagination to ``query``.
+
+    Returns ``(rows, next_cursor)``; ``next_cursor`` is None on the last page.
+    With ``limit=None`` the whole (sorted) result is returned. Segments are
+    queried in order and later ones are skipped once the page is full.
+    """
+    value = last_id = None
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort, descending)
+    rows = []
+    for where, keys in segments(sort, descending, value, last_id):
+        page = query.filter(*where).order_by(*keys)
+        if limit is None:
+            rows += page.all()
+            continue
+        rows += page.limit(limit + 1 - len(rows)).all()
+        if len(rows) > limit:
+            break
+    if limit is None or len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(sort, descending, rows[-1])
@@ -0,0 +1,117 @@
+import atexit
+import os
+import threading
+import time
+
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class HashQueueFull(RuntimeError):
+    """Raised when too many hash operations are already pending."""
+
+
+class PasswordHasher:
+    """Runs Werkzeug password hashing in a bounded process pool.
+
+    ``workers=0`` hashes inline in the calling thread. The pool is created
+    lazily and per process, so it is safe to construct before gunicorn forks.
+    Pool processes are started with forkserver (spawn where that is not
+    available), never by forking a worker that already runs threads.
+
+    The calling thread waits for its result, so the pool only adds
+    concurrency when the web worker is threaded (gthread): a sync worker
+    has at most one pending operation and gains nothing but IPC overhead,
+    so run those with ``workers=0``.
+    """
+
+    def __init__(self, method, salt_length=16, workers=0, max_pending=32):
+        self.method = method
+        self.salt_length = salt_length
+        # Werkzeug expands short methods ('scrypt', 'pbkdf2:sha256') to full
+        # parameter strings; compare stored hashes against the expanded form
+        self.hash_prefix = generate_password_hash('x', method, salt_length).split('$', 1)[0]
+        self.workers = workers
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pool = None
+        self._pool_pid = None
+        self._lock = threading.Lock()
+        self._metrics = {
+            op: {'count': 0, 'sum': 0.0, 'buckets': [0] * len(LATENCY_BUCKETS)}
+            for op in ('hash', 'verify')
+        }
+        self.rejected = 0
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                # Imported on first use: pulls in multiprocessing
+                import multiprocessing
+                from concurrent.futures import ProcessPoolExecutor
+                method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context(method))
+                self._pool_pid = os.getpid()
+                atexit.register(self._pool.shutdown, wait=False)
+            return self._pool
+
+    def _run(self, op, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HashQueueFull('Too many pending password operations')
+        start = time.perf_counter()
+        try:
+            if self.workers:
+                return self._executor().submit(fn, *args).result()
+            return fn(*args)
+        finally:
+            self._slots.release()
+            self._observe(op, time.perf_counter() - start)
+
+    def _observe(self, op, elapsed):
+        with self._lock:
+            m = self._metrics[op]
+            m['count'] += 1
+            m['sum'] += elapsed
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if elapsed <= bound:
+                    m['buckets'][i] += 1
+                    break
+
+    def hash(self, password):
+        return self._run('hash', generate_password_hash, password, self.method, self.salt_length)
+
+    def verify(self, pwhash, password):
+        return self._run('verify', check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """True if ``pwhash`` was made with different method/cost parameters."""
+        return pwhash.split('$', 1)[0] != self.hash_prefix
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'rejected': self.rejected,
+                'buckets': LATENCY_BUCKETS,
+                **{op: {'count': m['count'], 'sum': m['sum'], 'buckets': list(m['buckets'])}
+                   for op, m in self._metrics.items()},
+            }
+
+
+def init_password_hasher(app):
+    hasher = PasswordHasher(
+        method=app.config['PASSWORD_HASH_METHOD'],
+        salt_length=app.config.get('PASSWORD_HASH_SALT_LENGTH', 16),
+        workers=app.config.get('PASSWORD_HASH_WORKERS', 0),
+        max_pending=app.config.get('PASSWORD_HASH_MAX_PENDING', 32),
+    )
+    app.extensions['password_hasher'] = hasher
+    return hasher
+
+
+def get_password_hasher():
+    return current_app.extensions['password_hasher']
@@ -0,0 +1,146 @@
+import itertools
+import threading
+import time
+
+import sqlalchemy as sa
+from flask import current_app, g, has_app_context, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+
+STICKY_SESSION_KEY = '_db_primary_until'
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def read_only(view):
+    """Mark a view as safe to serve from a read replica."""
+    view._read_only = True
+    return view
+
+
+class ReplicaRouter:
+    """Picks a healthy replica engine, round-robin.
+
+    Health is probed with ``SELECT 1`` at most once per ``check_interval``
+    seconds per replica; unhealthy replicas are skipped until a later probe
+    succeeds, and when none are healthy reads fall back to the primary.
+    """
+
+    def __init__(self, engines, check_interval=10):
+        self.engines = engines
+        self.check_interval = check_interval
+        self._health = {id(e): (True, 0.0) for e in engines}
+        self._cycle = itertools.cycle(range(len(engines))) if engines else None
+        self._lock = threading.Lock()
+        self.replica_reads = 0
+        self.fallbacks = 0
+
+    def _healthy(self, engine):
+        # The probe runs without the lock: a slow or unreachable replica must
+        # not stall every other request picking one. The thread that finds a
+        # stale entry claims it; others keep the previous result meanwhile.
+        key = id(engine)
+        with self._lock:
+            healthy, checked = self._health[key]
+            now = time.monotonic()
+            if now - checked < self.check_interval:
+                return healthy
+            self._health[key] = (healthy, now)
+        try:
+            with engine.connect() as conn:
+                conn.exec_driver_sql('SELECT 1')
+            healthy = True
+        except Exception:
+            healthy = False
+        with self._lock:
+            self._health[key] = (healthy, now)
+        return healthy
+
+    def pick(self):
+        for _ in range(len(self.engines)):
+            with self._lock:
+                engine = self.engines[next(self._cycle)]
+            if self._healthy(engine):
+                with self._lock:
+                    self.replica_reads += 1
+                return engine
+        with self._lock:
+            self.fallbacks += 1
+        return None
+
+    def dispose(self, close=True):
+        for engine in self.engines:
+            engine.dispose(close=close)
+
+
+class RoutingSession(Session):
+    """Session that sends reads on replica-routed requests to a replica.
+
+    Sharded job tables go to the current user's shard first (see
+    ``app.sharding``); replicas only serve the primary's tables.
+
+    Flushes and INSERT/UPDATE/DELETE statements always go to the primary.
+    The replica is chosen once per request so every read in a request sees
+    the same snapshot source.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            shard = _shard_bind(mapper, clause)
+            if shard is not None:
+                return shard
+        if bind is None and not self._flushing and not getattr(clause, 'is_dml', False):
+            replica = _request_replica()
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _shard_bind(mapper, clause):
+    if not has_app_context():
+        return None
+    router = current_app.extensions.get('shard_router')
+    if router is None or not router.engines:
+        return None
+    return router.bind_for(mapper, clause)
+
+
+def _request_replica():
+    if not has_request_context() or not g.get('use_replica'):
+        return None
+    if 'replica_engine' not in g:
+        g.replica_engine = current_app.extensions['replica_router'].pick()
+    return g.replica_engine
+
+
+def _route_request():
+    router = current_app.extensions['replica_router']
+    if not router.engines or request.method not in READ_METHODS:
+        return
+    view = current_app.view_functions.get(request.endpoint)
+    if not getattr(view, '_read_only', False):
+        return
+    # Read-your-writes: stay on the primary for a while after this client wrote
+    if session.get(STICKY_SESSION_KEY, 0) > time.time():
+        return
+    g.use_replica = True
+
+
+def _mark_write(response):
+    if request.method not in READ_METHODS and response.status_code < 400:
+        window = current_app.config.get('REPLICA_STICKY_SECONDS', 5)
+        if window:
+            session[STICKY_SESSION_KEY] = time.time() + window
+    return response
+
+
+def init_replicas(app):
+    engine_options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    engines = [
+        sa.create_engine(uri, **engine_options)
+        for uri in app.config.get('SQLALCHEMY_REPLICA_URIS') or []
+    ]
+    router = ReplicaRouter(engines, app.config.get('REPLICA_HEALTH_CHECK_INTERVAL', 10))
+    app.extensions['replica_router'] = router
+    if engines:
+        app.before_request(_route_request)
+        app.after_request(_mark_write)
+    return router
@@ -0,0 +1,208 @@
+import hashlib
+import os
+import re
+import tempfile
+import time
+from collections import Counter
+from datetime import timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import delete, func, select, update
+
+from .models import db, JobApplication, ResumeBlob
+from .sharding import each_shard
+from .versioning import utcnow
+
+DIGEST_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+class ResumeError(ValueError):
+    """Raised for an unusable resume upload."""
+
+
+class ResumeTooLarge(ResumeError):
+    """Raised when an upload exceeds RESUME_MAX_BYTES."""
+
+
+class LocalFileStorage:
+    """Content-addressed files on local disk: ``<root>/ab/cd/<sha256>``.
+
+    Uploads are hashed while they are written to a temporary file, then
+    renamed into place; content that is already stored only gets its mtime
+    refreshed (so garbage collection's grace period restarts). Any object
+    with the same methods can be configured as ``RESUME_STORAGE_BACKEND``,
+    but downloads are served from ``path()`` with ``send_file``.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self._tmp = os.path.join(self.root, 'tmp')
+
+    def path(self, digest):
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def save(self, stream, max_bytes):
+        """Store ``stream``; returns ``(sha256, size)``."""
+        os.makedirs(self._tmp, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self._tmp)
+        sha, size = hashlib.sha256(), 0
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                while True:
+                    chunk = stream.read(self.CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise ResumeTooLarge(f'Resume exceeds {max_bytes} bytes')
+                    sha.update(chunk)
+                    f.write(chunk)
+            if not size:
+                raise ResumeError('Empty upload')
+            digest = sha.hexdigest()
+            final = self.path(digest)
+            if os.path.exists(final):
+                os.utime(final)
+                os.unlink(tmp)
+            else:
+                os.makedirs(os.path.dirname(final), exist_ok=True)
+                os.replace(tmp, final)
+            return digest, size
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+    def delete(self, digest):
+        try:
+            os.unlink(self.path(digest))
+        except FileNotFoundError:
+            pass
+
+    def stored(self):
+        """Yield ``(name, mtime)`` for every stored file, temporary ones included."""
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                try:
+                    yield name, os.stat(os.path.join(dirpath, name)).st_mtime
+                except FileNotFoundError:
+                    continue
+
+    def delete_temporary(self, name):
+        try:
+            os.unlink(os.path.join(self._tmp, name))
+        except FileNotFoundError:
+            pass
+
+
+def get_resume_storage():
+    return current_app.extensions['resume_storage']
+
+
+def _upsert_insert():
+    dialect = db.session.get_bind(mapper=ResumeBlob.__mapper__).dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert
+
+
+def add_reference(digest, size, content_type):
+    """Count one more job attaching ``digest``, creating the blob row if new."""
+    values = {'sha256': digest, 'size': size, 'content_type': content_type,
+              'ref_count': 1, 'updated_at': utcnow()}
+    insert = _upsert_insert()
+    if insert is not None:
+        stmt = insert(ResumeBlob)
+        db.session.execute(stmt.values(values).on_conflict_do_update(
+            index_elements=['sha256'],
+            set_={'ref_count': ResumeBlob.ref_count + 1, 'updated_at': stmt.excluded.updated_at},
+        ))
+        return
+    result = db.session.execute(
+        update(ResumeBlob).where(ResumeBlob.sha256 == digest)
+        .values(ref_count=ResumeBlob.ref_count + 1, updated_at=values['updated_at'])
+    )
+    if result.rowcount == 0:
+        db.session.add(ResumeBlob(**values))
+
+
+def release_references(digests):
+    """Drop one reference per entry in ``digests`` (None entries are skipped)."""
+    now = utcnow()
+    for digest, n in Counter(d for d in digests if d).items():
+        db.session.execute(
+            update(ResumeBlob).where(ResumeBlob.sha256 == digest)
+            .values(ref_count=ResumeBlob.ref_count - n, updated_at=now)
+        )
+
+
+def recount_references():
+    """Recompute every blob's ref_count from the job applications."""
+    counts = Counter()
+    for _ in each_shard():
+        counts.update(dict(db.session.execute(
+            select(JobApplication.resume_sha256, func.count())
+            .where(JobApplication.resume_sha256.isnot(None))
+            .group_by(JobApplication.resume_sha256)
+        ).all()))
+    db.session.execute(update(ResumeBlob).values(ref_count=0))
+    for digest, n in counts.items():
+        db.session.execute(update(ResumeBlob).where(ResumeBlob.sha256 == digest).values(ref_count=n))
+    db.session.commit()
+
+
+def collect_garbage(grace):
+    """Delete unreferenced blobs and stray files older than ``grace``.
+
+    Returns the number of files removed. Files are only deleted when their
+    mtime is also past the grace period, so an upload of the same content
+    racing with collection keeps its file.
+    """
+    storage = get_resume_storage()
+    db.session.execute(
+        delete(ResumeBlob)
+        .where(ResumeBlob.ref_count <= 0, ResumeBlob.updated_at < utcnow() - grace)
+    )
+    db.session.commit()
+    live = set(db.session.scalars(select(ResumeBlob.sha256)))
+    cutoff = time.time() - grace.total_seconds()
+    removed = 0
+    for name, mtime in list(storage.stored()):
+        if name in live or mtime >= cutoff:
+            continue
+        if DIGEST_RE.match(name):
+            storage.delete(name)
+        else:
+            storage.delete_temporary(name)
+        removed += 1
+    return removed
+
+
+@click.command('gc-resumes')
+@click.option('--hours', type=int, default=None,
+              help='Grace period in hours (default: RESUME_GC_GRACE_HOURS).')
+@click.option('--recount', is_flag=True, help='Rebuild reference counts from jobs first.')
+@with_appcontext
+def gc_resumes_command(hours, recount):
+    """Remove resume files no job application references."""
+    if hours is None:
+        hours = current_app.config['RESUME_GC_GRACE_HOURS']
+    if recount:
+        recount_references()
+    removed = collect_garbage(timedelta(hours=hours))
+    click.echo(f'Removed {removed} file(s).')
+
+
+def init_resume_storage(app):
+    storage = app.config.get('RESUME_STORAGE_BACKEND') or LocalFileStorage(
+        app.config.get('RESUME_STORAGE_DIR', 'resume_files'))
+    app.extensions['resume_storage'] = storage
+    return storage
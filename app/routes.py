@@ -1,14 +1,24 @@
-from flask import Blueprint, request, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import Blueprint, request, jsonify, current_app
 from .models import User
 from . import db, login_manager
 from flask_login import login_user, logout_user, login_required, current_user
 from flask_cors import cross_origin
+from .versioning import conditional_get
+from .user_cache import load_cached_user
+from .passwords import HashQueueFull, get_password_hasher
+from .replicas import read_only
+from .admission import busy_response
 auth_bp = Blueprint('auth', __name__)
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    try:
+        return load_cached_user(int(user_id))
+    except ValueError:
+        return None
+
+def _busy_response():
+    return busy_response(current_app.config.get('ADMISSION_RETRY_AFTER', 1))
 
 @auth_bp.route('/logout', methods=['POST'])
 @login_required
@@ -27,11 +37,14 @@ def register():
     try:
         if User.query.filter((User.username == username) | (User.email == email)).first():
             return jsonify({'error': 'User already exists'}), 400
-        hashed_pw = generate_password_hash(password)
+        hashed_pw = get_password_hasher().hash(password)
         user = User(username=username, email=email, password=hashed_pw)
         db.session.add(user)
         db.session.commit()
         return jsonify({'message': 'User registered successfully'})
+    except HashQueueFull:
+        db.session.rollback()
+        return _busy_response()
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Registration failed', 'details': str(e)}), 500
@@ -43,15 +56,25 @@ def login():
     password = data.get('password')
     try:
         user = User.query.filter_by(username=username).first()
-        if user and check_password_hash(user.password, password):
+        hasher = get_password_hasher()
+        if user and hasher.verify(user.password, password):
+            if hasher.needs_rehash(user.password):
+                # Upgrade hashes made with outdated method/cost parameters
+                user.password = hasher.hash(password)
+                db.session.commit()
             login_user(user, remember=True)
             return jsonify({'message': 'Logged in successfully'})
         return jsonify({'error': 'Invalid credentials'}), 401
+    except HashQueueFull:
+        db.session.rollback()
+        return _busy_response()
     except Exception as e:
         return jsonify({'error': 'Login failed', 'details': str(e)}), 500
 
 @auth_bp.route('/api/me', methods=['GET'])
+@read_only
 @login_required
+@conditional_get('me')
 def get_current_user():
     user = current_user
     return jsonify({
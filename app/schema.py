@@ -0,0 +1,54 @@
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from .migrations import MIGRATIONS, migrate
+from .models import db
+from .sharding import create_shard_schema, get_shard_router
+
+# The newest migration. create_all() only creates missing tables, so any
+# column or index added to an existing table needs a step in app/migrations.py.
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+_VERSION_TABLE = 'schema_version'
+
+
+def stored_schema_version():
+    """Return the version recorded in the database, or None if unknown."""
+    try:
+        return db.session.execute(text(f'SELECT version FROM {_VERSION_TABLE}')).scalar()
+    except DBAPIError:
+        db.session.rollback()
+        return None
+
+
+def ensure_schema():
+    """Bring the database up to SCHEMA_VERSION if the stored version is older.
+
+    Creates missing tables, then runs the migrations newer than the stored
+    version. On an up-to-date database this is a single one-row SELECT.
+    Returns True if anything ran.
+    """
+    stored = stored_schema_version()
+    if stored == SCHEMA_VERSION:
+        return False
+    db.create_all()
+    for index, engine in enumerate(get_shard_router().engines):
+        create_shard_schema(engine, index)
+    with db.engine.begin() as conn:
+        migrate(conn, stored)
+        conn.execute(text(f'CREATE TABLE IF NOT EXISTS {_VERSION_TABLE} (version INTEGER NOT NULL)'))
+        conn.execute(text(f'DELETE FROM {_VERSION_TABLE}'))
+        conn.execute(text(f'INSERT INTO {_VERSION_TABLE} (version) VALUES (:v)'), {'v': SCHEMA_VERSION})
+    return True
+
+
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    """Create missing tables and run pending migrations."""
+    if ensure_schema():
+        click.echo(f'Database migrated to schema version {SCHEMA_VERSION}.')
+    else:
+        click.echo(f'Schema is up to date (version {SCHEMA_VERSION}).')
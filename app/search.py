@@ -0,0 +1,271 @@
+import re
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import bindparam, event, func, select, text
+
+from .models import db, JobApplication
+
+SEARCH_FIELDS = ('company', 'position', 'resume_used')
+
+# Textual statements carry no table; this routes them with job_application
+# (to the user's shard when sharding is enabled).
+_JOBS_BIND = {'mapper': JobApplication}
+
+
+class SearchError(ValueError):
+    """Raised for an empty or unusable search query."""
+
+
+def tokenize(q):
+    tokens = re.findall(r'\w+', (q or '').lower())
+    if not tokens:
+        raise SearchError('q must contain at least one word')
+    return tokens[:16]
+
+
+def _like_prefix(value):
+    escaped = value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return escaped + '%'
+
+
+class SearchBackend:
+    """Generic fallback: unindexed ILIKE matching for unknown dialects.
+
+    Backends return ``[(job_id, rank)]`` from ``search`` (best first) and
+    ``[(value, count)]`` from ``suggest``. ``index``/``remove`` keep any
+    side index in sync and run in the caller's transaction.
+    """
+
+    def create(self, connection):
+        pass
+
+    def drop(self, connection):
+        pass
+
+    def index(self, ids):
+        pass
+
+    def remove(self, ids):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def populate(self, connection):
+        """Fill a freshly created index from existing rows (migrations)."""
+
+    def search(self, user_id, tokens, limit, offset):
+        query = select(JobApplication.id).where(JobApplication.user_id == user_id)
+        for token in tokens:
+            pattern = f'%{token}%'
+            query = query.where(
+                JobApplication.company.ilike(pattern)
+                | JobApplication.position.ilike(pattern)
+                | JobApplication.resume_used.ilike(pattern)
+            )
+        query = query.order_by(JobApplication.id.desc()).limit(limit).offset(offset)
+        return [(job_id, 0.0) for job_id in db.session.scalars(query)]
+
+    def suggest(self, user_id, field, prefix, limit):
+        column = getattr(JobApplication, field)
+        query = (
+            select(column, func.count())
+            .where(JobApplication.user_id == user_id,
+                   column.ilike(_like_prefix(prefix), escape='\\'))
+            .group_by(column)
+            .order_by(func.count().desc(), column)
+            .limit(limit)
+        )
+        return [tuple(row) for row in db.session.execute(query)]
+
+
+class SqliteSearchBackend(SearchBackend):
+    """FTS5 side table keyed by job id (rowid), synced explicitly.
+
+    ``user_id`` holds an indexed ``u<id>`` token that every query matches,
+    so the full-text lookup itself is scoped to one user instead of
+    collecting every tenant's hits and filtering them afterwards.
+    """
+
+    # bm25 weights: user_id (scoping token only), company, position, resume_used
+    RANK = 'bm25(job_search, 0.0, 10.0, 5.0, 1.0)'
+    COLUMNS = "rowid, user_id, company, position, resume_used"
+    SOURCE = "id, 'u' || user_id, company, position, resume_used"
+
+    def create(self, connection):
+        connection.exec_driver_sql(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS job_search USING fts5("
+            "user_id, company, position, resume_used, "
+            "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+
+    def drop(self, connection):
+        connection.exec_driver_sql('DROP TABLE IF EXISTS job_search')
+
+    def index(self, ids):
+        if not ids:
+            return
+        # Core statements don't autoflush; the copy must see pending ORM changes
+        db.session.flush()
+        self.remove(ids)
+        db.session.execute(
+            text(
+                f'INSERT INTO job_search ({self.COLUMNS}) '
+                f'SELECT {self.SOURCE} FROM job_application WHERE id IN :ids'
+            ).bindparams(bindparam('ids', expanding=True)),
+            {'ids': list(ids)},
+            bind_arguments=_JOBS_BIND,
+        )
+
+    def remove(self, ids):
+        if not ids:
+            return
+        db.session.execute(
+            text('DELETE FROM job_search WHERE rowid IN :ids')
+            .bindparams(bindparam('ids', expanding=True)),
+            {'ids': list(ids)},
+            bind_arguments=_JOBS_BIND,
+        )
+
+    def rebuild(self):
+        self.populate(db.session.connection(bind_arguments=_JOBS_BIND))
+
+    def populate(self, connection):
+        connection.exec_driver_sql('DELETE FROM job_search')
+        connection.exec_driver_sql(
+            f'INSERT INTO job_search ({self.COLUMNS}) '
+            f'SELECT {self.SOURCE} FROM job_application'
+        )
+
+    @staticmethod
+    def _match(user_id, tokens, field=None):
+        owner = f'user_id : "u{int(user_id)}"'
+        if field:
+            # Tokens in order from the start of the value, like a LIKE 'p%'
+            phrase = ' + '.join(f'"{t}"' for t in tokens)
+            return f'{owner} AND {field} : (^ {phrase}*)'
+        terms = [f'"{t}"' for t in tokens[:-1]] + [f'"{tokens[-1]}"*']
+        return f'{owner} AND {{company position resume_used}} : ({" ".join(terms)})'
+
+    def search(self, user_id, tokens, limit, offset):
+        rows = db.session.execute(
+            text(
+                f'SELECT rowid, {self.RANK} AS rank FROM job_search '
+                'WHERE job_search MATCH :q '
+                'ORDER BY rank, rowid DESC LIMIT :limit OFFSET :offset'
+            ),
+            {'q': self._match(user_id, tokens), 'limit': limit, 'offset': offset},
+            bind_arguments=_JOBS_BIND,
+        )
+        return [(job_id, -rank) for job_id, rank in rows]
+
+    def suggest(self, user_id, field, prefix, limit):
+        # MATCH finds candidates through the index; the LIKE applies the same
+        # start-of-value test as the other backends (punctuation, accents)
+        rows = db.session.execute(
+            text(
+                f'SELECT {field}, count(*) AS n FROM job_search '
+                f"WHERE job_search MATCH :q AND lower({field}) LIKE lower(:prefix) ESCAPE '\\' "
+                f'GROUP BY {field} ORDER BY n DESC, {field} LIMIT :limit'
+            ),
+            {'q': self._match(user_id, tokenize(prefix), field),
+             'prefix': _like_prefix(prefix), 'limit': limit},
+            bind_arguments=_JOBS_BIND,
+        )
+        return [tuple(row) for row in rows]
+
+
+class PostgresSearchBackend(SearchBackend):
+    """Expression GIN index over a weighted tsvector plus pg_trgm indexes.
+
+    The indexes live on job_application itself, so PostgreSQL keeps them in
+    sync and ``index``/``remove`` have nothing to do.
+    """
+
+    VECTOR = (
+        "setweight(to_tsvector('simple', coalesce(company, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(position, '')), 'B') || "
+        "setweight(to_tsvector('simple', coalesce(resume_used, '')), 'C')"
+    )
+
+    def create(self, connection):
+        connection.exec_driver_sql('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        connection.exec_driver_sql(
+            f'CREATE INDEX IF NOT EXISTS ix_job_search_doc ON job_application USING gin (({self.VECTOR}))'
+        )
+        for field in SEARCH_FIELDS:
+            connection.exec_driver_sql(
+                f'CREATE INDEX IF NOT EXISTS ix_job_{field}_trgm '
+                f'ON job_application USING gin ({field} gin_trgm_ops)'
+            )
+
+    def search(self, user_id, tokens, limit, offset):
+        tsquery = ' & '.join(tokens[:-1] + [tokens[-1] + ':*'])
+        rows = db.session.execute(
+            text(
+                f'SELECT id, ts_rank({self.VECTOR}, q) AS rank '
+                "FROM job_application, to_tsquery('simple', :q) q "
+                f'WHERE user_id = :uid AND ({self.VECTOR}) @@ q '
+                'ORDER BY rank DESC, id DESC LIMIT :limit OFFSET :offset'
+            ),
+            {'q': tsquery, 'uid': user_id, 'limit': limit, 'offset': offset},
+            bind_arguments=_JOBS_BIND,
+        )
+        return [(job_id, float(rank)) for job_id, rank in rows]
+
+
+_BACKENDS = {
+    'sqlite': SqliteSearchBackend(),
+    'postgresql': PostgresSearchBackend(),
+}
+_FALLBACK = SearchBackend()
+
+
+def backend_for(dialect_name):
+    return _BACKENDS.get(dialect_name, _FALLBACK)
+
+
+def get_search_backend():
+    bind = db.session.get_bind(mapper=JobApplication.__mapper__)
+    return backend_for(bind.dialect.name)
+
+
+def index_jobs(ids):
+    get_search_backend().index(ids)
+
+
+def remove_jobs(ids):
+    get_search_backend().remove(ids)
+
+
+def search_jobs(user_id, q, limit, offset):
+    return get_search_backend().search(user_id, tokenize(q), limit, offset)
+
+
+def suggest(user_id, field, prefix, limit):
+    if field not in SEARCH_FIELDS:
+        raise SearchError(f'field must be one of: {", ".join(SEARCH_FIELDS)}')
+    tokenize(prefix)
+    return get_search_backend().suggest(user_id, field, prefix.strip(), limit)
+
+
+@event.listens_for(JobApplication.__table__, 'after_create')
+def _create_search_index(target, connection, **kw):
+    backend_for(connection.dialect.name).create(connection)
+
+
+@event.listens_for(JobApplication.__table__, 'before_drop')
+def _drop_search_index(target, connection, **kw):
+    backend_for(connection.dialect.name).drop(connection)
+
+
+@click.command('rebuild-search-index')
+@with_appcontext
+def rebuild_search_index_command():
+    """Repopulate the full-text search index from job applications."""
+    from .sharding import each_shard
+    for _ in each_shard():
+        get_search_backend().rebuild()
+        db.session.commit()
+    click.echo('Search index rebuilt.')
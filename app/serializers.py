@@ -0,0 +1,75 @@
+import json
+
+from flask.json.provider import DefaultJSONProvider
+
+from .models import JobApplication
+
+try:
+    import orjson
+except ImportError:  # optional speedup, stdlib json is used without it
+    orjson = None
+
+JOB_FIELDS = ('id', 'company', 'position', 'resume_used', 'date_applied', 'status', 'resume_sha256')
+
+
+class FieldsError(ValueError):
+    """Raised when ``?fields=`` names an unknown field."""
+
+
+def parse_fields(raw):
+    """Turn ``?fields=id,company`` into a tuple of job fields (default: all)."""
+    if not raw:
+        return JOB_FIELDS
+    fields = tuple(dict.fromkeys(f.strip() for f in raw.split(',') if f.strip()))
+    unknown = [f for f in fields if f not in JOB_FIELDS]
+    if unknown or not fields:
+        raise FieldsError(f'Unknown field(s): {", ".join(unknown) or raw}')
+    return fields
+
+
+def job_columns(fields, extra=()):
+    """Columns to select for ``fields``; ``extra`` adds columns needed internally."""
+    names = tuple(dict.fromkeys(fields + tuple(extra)))
+    return [getattr(JobApplication, name) for name in names]
+
+
+def _value(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def serialize_rows(rows, fields):
+    """Build dicts from column-only result rows (or ORM objects)."""
+    return [{f: _value(getattr(row, f)) for f in fields} for row in rows]
+
+
+def dumps_line(obj):
+    """Compact one-line JSON as str, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, separators=(',', ':'))
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, falling back to the stdlib.
+
+    Response bodies are written straight from orjson's bytes. Dates and
+    types orjson can't encode go through Flask's default hook, so output
+    matches the stdlib provider.
+    """
+
+    OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self.OPTIONS).decode()
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        option = self.OPTIONS
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            option |= orjson.OPT_INDENT_2
+        body = orjson.dumps(obj, default=self.default, option=option) + b'\n'
+        return self._app.response_class(body, mimetype=self.mimetype)
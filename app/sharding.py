@@ -0,0 +1,290 @@
+from contextlib import contextmanager
+
+import click
+import sqlalchemy as sa
+from flask import current_app, g, has_request_context
+from flask.cli import with_appcontext
+from flask_login import current_user
+from sqlalchemy import delete, event, insert, select, update
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from .models import db, JobApplication, JobStat, JobTombstone
+from .search import backend_for, index_jobs, remove_jobs
+
+# Tables whose rows live on the owning user's shard; everything else
+# (users, schema version) stays on the primary.
+SHARDED_MODELS = (JobApplication, JobStat, JobTombstone)
+SHARDED_TABLES = frozenset(model.__table__ for model in SHARDED_MODELS)
+
+# Per-shard job id allocator. Shard i hands out ids congruent to i modulo
+# SHARD_ID_STRIDE, so rows moved between shards keep their ids without
+# colliding with ids the destination generates later.
+_id_counter = sa.Table(
+    'shard_id_counter', sa.MetaData(),
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('shard_index', sa.Integer, nullable=False),
+    sa.Column('next_value', sa.Integer, nullable=False),
+)
+
+
+class ShardKeyError(RuntimeError):
+    """Raised when a sharded table is queried with no user to route by."""
+
+
+def jump_hash(key, buckets):
+    """Jump consistent hash (Lamping & Veach): growing from n to n+1
+    buckets only moves keys into the new bucket."""
+    b, j = -1, 0
+    while j < buckets:
+        b = j
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        j = int((b + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return b
+
+
+class ShardRouter:
+    """Maps user ids to shard engines and picks the bind for a query."""
+
+    def __init__(self, engines, stride=16):
+        if len(engines) > stride:
+            raise ValueError(f'At most SHARD_ID_STRIDE={stride} shards are supported')
+        self.engines = engines
+        self.stride = stride
+
+    def shard_for(self, user_id):
+        return jump_hash(int(user_id), len(self.engines))
+
+    def engine_for(self, user_id):
+        return self.engines[self.shard_for(user_id)]
+
+    def bind_for(self, mapper=None, clause=None):
+        """Engine for a query on a sharded table, or None to use the default."""
+        if mapper is not None:
+            table = sa.inspect(mapper).local_table
+        elif isinstance(clause, sa.Table):
+            table = clause
+        elif isinstance(clause, sa.UpdateBase):
+            table = clause.table
+        else:
+            return None
+        if table not in SHARDED_TABLES:
+            return None
+        if 'shard_engine' in g:
+            return g.shard_engine
+        if has_request_context() and current_user.is_authenticated:
+            return self.engine_for(current_user.id)
+        raise ShardKeyError(f'No shard selected for {table.name}; use use_shard()')
+
+    def dispose(self, close=True):
+        for engine in self.engines:
+            engine.dispose(close=close)
+
+
+def get_shard_router():
+    return current_app.extensions['shard_router']
+
+
+def is_sharded():
+    return bool(get_shard_router().engines)
+
+
+@contextmanager
+def use_engine(engine):
+    """Route sharded tables to ``engine`` inside the block (CLI and tools)."""
+    previous = g.pop('shard_engine', None)
+    g.shard_engine = engine
+    try:
+        yield engine
+    finally:
+        g.pop('shard_engine', None)
+        if previous is not None:
+            g.shard_engine = previous
+
+
+def use_shard(index):
+    return use_engine(get_shard_router().engines[index])
+
+
+def each_shard():
+    """Yield once per shard with sharded tables routed to it.
+
+    Without shards this yields once and queries use the primary as usual.
+    """
+    router = get_shard_router()
+    if not router.engines:
+        yield None
+        return
+    for index in range(len(router.engines)):
+        with use_shard(index):
+            yield index
+
+
+def _allocate_ids(connection, count):
+    next_value, shard_index = connection.execute(
+        update(_id_counter)
+        .values(next_value=_id_counter.c.next_value + count)
+        .returning(_id_counter.c.next_value, _id_counter.c.shard_index)
+    ).one()
+    stride = get_shard_router().stride
+    return [n * stride + shard_index for n in range(next_value - count, next_value)]
+
+
+def assign_job_ids(rows):
+    """Give Core-inserted job rows shard-unique ids (no-op when unsharded)."""
+    if not rows or not is_sharded():
+        return
+    connection = db.session.connection(bind_arguments={'mapper': JobApplication})
+    for row, job_id in zip(rows, _allocate_ids(connection, len(rows))):
+        row['id'] = job_id
+
+
+@event.listens_for(JobApplication, 'before_insert')
+def _assign_orm_job_id(mapper, connection, target):
+    if target.id is None and is_sharded():
+        target.id = _allocate_ids(connection, 1)[0]
+
+
+def create_shard_schema(engine, shard_index):
+    """Create the sharded tables, indexes, search index and id counter.
+
+    Foreign keys to ``user`` are left out: that table lives on the primary.
+    Safe to run repeatedly.
+    """
+    with engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            if table not in SHARDED_TABLES:
+                continue
+            conn.execute(CreateTable(table, include_foreign_key_constraints=[], if_not_exists=True))
+            for index in table.indexes:
+                conn.execute(CreateIndex(index, if_not_exists=True))
+        backend_for(conn.dialect.name).create(conn)
+        _id_counter.create(conn, checkfirst=True)
+        if conn.execute(select(_id_counter.c.id)).first() is None:
+            conn.execute(insert(_id_counter).values(id=1, shard_index=shard_index, next_value=1))
+
+
+def _user_ids():
+    ids = set()
+    for model in SHARDED_MODELS:
+        ids.update(db.session.scalars(select(model.user_id).distinct()))
+    return ids
+
+
+def _user_rows(model, user_id):
+    columns = [getattr(model, c.key) for c in model.__table__.columns]
+    rows = db.session.execute(select(*columns).where(model.user_id == user_id))
+    return [dict(row._mapping) for row in rows]
+
+
+def _delete_user(user_id):
+    job_ids = db.session.scalars(
+        select(JobApplication.id).where(JobApplication.user_id == user_id)).all()
+    remove_jobs(job_ids)
+    for model in SHARDED_MODELS:
+        db.session.execute(delete(model).where(model.user_id == user_id))
+
+
+def _raise_id_floor(max_id):
+    """Make the selected shard allocate only ids above ``max_id``."""
+    floor = max_id // get_shard_router().stride + 1
+    db.session.connection(bind_arguments={'mapper': JobApplication}).execute(
+        update(_id_counter).values(next_value=sa.case(
+            (_id_counter.c.next_value < floor, floor), else_=_id_counter.c.next_value))
+    )
+
+
+def move_user(user_id, source, target):
+    """Copy one user's sharded rows from ``source`` to ``target``, then
+    delete them from ``source``. Job ids are kept, so the target's id
+    counter must already be above them (see ``rebalance_shards``).
+
+    The target is cleared first and committed before the source is touched,
+    so an interrupted move can simply be run again.
+    """
+    with use_engine(source):
+        rows = {model: _user_rows(model, user_id) for model in SHARDED_MODELS}
+        db.session.commit()
+    jobs = rows[JobApplication]
+    with use_engine(target):
+        _delete_user(user_id)
+        for model, model_rows in rows.items():
+            if model is JobTombstone:
+                # Tombstone ids are internal; let the target number them
+                model_rows = [{k: v for k, v in r.items() if k != 'id'} for r in model_rows]
+            if model_rows:
+                db.session.execute(insert(model), model_rows)
+        index_jobs([job['id'] for job in jobs])
+        db.session.commit()
+    with use_engine(source):
+        _delete_user(user_id)
+        db.session.commit()
+    return len(jobs)
+
+
+def rebalance_shards(from_primary=False, drain_uris=()):
+    """Move every user whose rows are not on their shard to it.
+
+    Scans all configured shards, plus the primary (``from_primary``, when
+    first enabling sharding) and any ``drain_uris`` (shards being removed).
+    Returns ``(users_moved, jobs_moved)``. Run with writes stopped.
+    """
+    router = get_shard_router()
+    for index, engine in enumerate(router.engines):
+        create_shard_schema(engine, index)
+    drained = [sa.create_engine(uri) for uri in drain_uris]
+    sources = ([db.engine] if from_primary else []) + drained + list(router.engines)
+    users = jobs = 0
+    try:
+        # Primary ids were not allocated by stride and a new shard's counter
+        # starts at 1, so a shard could later generate an id that already
+        # exists elsewhere. Start every shard above the largest existing id
+        # (this also keeps id order following creation order).
+        max_ids = []
+        for source in sources:
+            with use_engine(source):
+                max_ids.append(db.session.scalar(select(sa.func.max(JobApplication.id))))
+                db.session.commit()
+        max_ids = [n for n in max_ids if n is not None]
+        if max_ids:
+            for _ in each_shard():
+                _raise_id_floor(max(max_ids))
+                db.session.commit()
+        for source in sources:
+            with use_engine(source):
+                user_ids = sorted(_user_ids())
+                db.session.commit()
+            for user_id in user_ids:
+                target = router.engine_for(user_id)
+                if target is source:
+                    continue
+                jobs += move_user(user_id, source, target)
+                users += 1
+    finally:
+        for engine in drained:
+            engine.dispose()
+    return users, jobs
+
+
+@click.command('rebalance-shards')
+@click.option('--from-primary', is_flag=True,
+              help='Also move job data off the primary (when first enabling sharding).')
+@click.option('--drain', 'drain_uris', multiple=True,
+              help='URI of a shard being removed; its users are moved off it.')
+@with_appcontext
+def rebalance_shards_command(from_primary, drain_uris):
+    """Move users' job data to the shard their user id maps to."""
+    if not is_sharded():
+        raise click.UsageError('Set SQLALCHEMY_SHARD_URIS first.')
+    users, jobs = rebalance_shards(from_primary, drain_uris)
+    click.echo(f'Moved {users} user(s), {jobs} job(s).')
+
+
+def init_sharding(app):
+    engine_options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    engines = [
+        sa.create_engine(uri, **engine_options)
+        for uri in app.config.get('SQLALCHEMY_SHARD_URIS') or []
+    ]
+    router = ShardRouter(engines, app.config.get('SHARD_ID_STRIDE', 16))
+    app.extensions['shard_router'] = router
+    return router
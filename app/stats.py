@@ -0,0 +1,158 @@
+from collections import Counter
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import delete, func, select, update
+
+from .models import db, JobApplication, JobStat
+from .sharding import each_shard, get_shard_router, is_sharded, use_shard
+
+UNKNOWN_STATUS = 'unknown'
+
+# Ordered pipeline stages; a job counts as having reached a stage if its
+# status is that stage or any later one.
+FUNNEL_STAGES = ('applied', 'interview', 'hired')
+
+
+def job_buckets(status, date_applied):
+    """Counter keys a single job contributes to."""
+    keys = [('status', status or UNKNOWN_STATUS)]
+    if date_applied is not None:
+        year, week, _ = date_applied.isocalendar()
+        keys.append(('week', f'{year}-W{week:02d}'))
+        keys.append(('month', date_applied.strftime('%Y-%m')))
+    return keys
+
+
+def add_job(deltas, status, date_applied, sign=1):
+    for key in job_buckets(status, date_applied):
+        deltas[key] += sign
+
+
+def _upsert_insert():
+    dialect = db.session.get_bind(mapper=JobStat.__mapper__).dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert
+
+
+def apply_deltas(user_id, deltas):
+    """Add ``deltas`` ({(kind, bucket): n}) to the user's counters.
+
+    Runs in the caller's transaction so counters commit or roll back together
+    with the JobApplication change that produced them.
+    """
+    params = [
+        {'user_id': user_id, 'kind': kind, 'bucket': bucket, 'count': n}
+        for (kind, bucket), n in deltas.items() if n
+    ]
+    if not params:
+        return
+    insert = _upsert_insert()
+    if insert is not None:
+        stmt = insert(JobStat)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['user_id', 'kind', 'bucket'],
+            set_={'count': JobStat.count + stmt.excluded['count']},
+        )
+        db.session.execute(stmt, params)
+        return
+    for p in params:
+        result = db.session.execute(
+            update(JobStat)
+            .where(JobStat.user_id == p['user_id'], JobStat.kind == p['kind'],
+                   JobStat.bucket == p['bucket'])
+            .values(count=JobStat.count + p['count'])
+        )
+        if result.rowcount == 0:
+            db.session.add(JobStat(**p))
+
+
+def record_change(user_id, old=None, new=None):
+    """Apply the counter change for one job going from ``old`` to ``new``.
+
+    ``old``/``new`` are (status, date_applied) tuples, or None for a create
+    or delete respectively.
+    """
+    deltas = Counter()
+    if old is not None:
+        add_job(deltas, *old, sign=-1)
+    if new is not None:
+        add_job(deltas, *new)
+    apply_deltas(user_id, deltas)
+
+
+def get_stats(user_id):
+    rows = db.session.execute(
+        select(JobStat.kind, JobStat.bucket, JobStat.count)
+        .where(JobStat.user_id == user_id, JobStat.count > 0)
+    ).all()
+    grouped = {'status': {}, 'week': {}, 'month': {}}
+    for kind, bucket, count in rows:
+        grouped.setdefault(kind, {})[bucket] = count
+    by_status = grouped['status']
+    total = sum(by_status.values())
+
+    reached = {}
+    for i, stage in enumerate(FUNNEL_STAGES):
+        if i == 0:
+            reached[stage] = total
+        else:
+            reached[stage] = sum(by_status.get(s, 0) for s in FUNNEL_STAGES[i:])
+    conversion = {}
+    for prev, stage in zip(FUNNEL_STAGES, FUNNEL_STAGES[1:]):
+        conversion[f'{prev}_to_{stage}'] = (
+            round(reached[stage] / reached[prev], 4) if reached[prev] else 0.0
+        )
+
+    return {
+        'total': total,
+        'by_status': by_status,
+        'weekly': dict(sorted(grouped['week'].items())),
+        'monthly': dict(sorted(grouped['month'].items())),
+        'funnel': {'reached': reached, 'conversion': conversion},
+    }
+
+
+def rebuild_stats(user_id=None):
+    """Recompute JobStat rows from JobApplication and commit.
+
+    Groups by (user, status, date) in SQL so only distinct combinations are
+    pulled into Python, then buckets them into weeks and months.
+    """
+    stmt = (
+        select(JobApplication.user_id, JobApplication.status,
+               JobApplication.date_applied, func.count())
+        .group_by(JobApplication.user_id, JobApplication.status, JobApplication.date_applied)
+    )
+    clear = delete(JobStat)
+    if user_id is not None:
+        stmt = stmt.where(JobApplication.user_id == user_id)
+        clear = clear.where(JobStat.user_id == user_id)
+
+    per_user = {}
+    for uid, status, date_applied, n in db.session.execute(stmt):
+        add_job(per_user.setdefault(uid, Counter()), status, date_applied, sign=n)
+
+    db.session.execute(clear)
+    for uid, deltas in per_user.items():
+        apply_deltas(uid, deltas)
+    db.session.commit()
+    return len(per_user)
+
+
+@click.command('rebuild-stats')
+@click.option('--user-id', type=int, default=None, help='Only rebuild this user.')
+@with_appcontext
+def rebuild_stats_command(user_id):
+    """Recompute per-user job statistics from job applications."""
+    if user_id is not None and is_sharded():
+        with use_shard(get_shard_router().shard_for(user_id)):
+            users = rebuild_stats(user_id)
+    else:
+        users = sum(rebuild_stats(user_id) for _ in each_shard())
+    click.echo(f'Rebuilt statistics for {users} user(s).')
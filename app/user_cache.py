@@ -0,0 +1,187 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, has_app_context
+from flask_login import UserMixin
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, object_session
+
+from .models import db, User
+
+
+class CachedUser(UserMixin):
+    """Lightweight authenticated identity; carries no password hash."""
+
+    __slots__ = ('id', 'username', 'email')
+
+    def __init__(self, id, username, email):
+        self.id = id
+        self.username = username
+        self.email = email
+
+    def to_dict(self):
+        return {'id': self.id, 'username': self.username, 'email': self.email}
+
+
+class LocalBackend:
+    """In-process stand-in for a shared cache (e.g. Redis) used in tests.
+
+    Any object with the same get/set/delete methods can be configured as
+    ``USER_CACHE_BACKEND`` to share identities between worker processes.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class UserCache:
+    """Bounded TTL LRU of user identities, or a shared backend.
+
+    With a backend every lookup goes to it and the local LRU is not used:
+    ``invalidate`` can only reach the calling process, so a local copy in
+    another worker would keep serving a changed or deleted user until its
+    TTL ran out.
+    """
+
+    def __init__(self, ttl=60, max_size=10000, backend=None):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.backend = backend
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.backend_hits = 0
+
+    @staticmethod
+    def _key(user_id):
+        return f'user:{user_id}'
+
+    def get(self, user_id):
+        if self.backend is not None:
+            data = self.backend.get(self._key(user_id))
+            with self._lock:
+                if data is None:
+                    self.misses += 1
+                    return None
+                self.backend_hits += 1
+            return CachedUser(**data)
+        now = time.monotonic()
+        with self._lock:
+            item = self._entries.get(user_id)
+            if item is not None:
+                user, expires = item
+                if expires > now:
+                    self._entries.move_to_end(user_id)
+                    self.hits += 1
+                    return user
+                del self._entries[user_id]
+            self.misses += 1
+        return None
+
+    def _store(self, user_id, user):
+        with self._lock:
+            self._entries[user_id] = (user, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def set(self, user):
+        if self.backend is not None:
+            self.backend.set(self._key(user.id), user.to_dict(), self.ttl)
+        else:
+            self._store(user.id, user)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+        if self.backend is not None:
+            self.backend.delete(self._key(user_id))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'backend_hits': self.backend_hits,
+                'misses': self.misses,
+            }
+
+
+def init_user_cache(app):
+    cache = UserCache(
+        ttl=app.config.get('USER_CACHE_TTL', 60),
+        max_size=app.config.get('USER_CACHE_MAX_SIZE', 10000),
+        backend=app.config.get('USER_CACHE_BACKEND'),
+    )
+    app.extensions['user_cache'] = cache
+    return cache
+
+
+def get_user_cache():
+    return current_app.extensions['user_cache']
+
+
+def load_cached_user(user_id):
+    """Return a CachedUser, hitting the database only on a cache miss."""
+    cache = get_user_cache()
+    user = cache.get(user_id)
+    if user is not None:
+        return user
+    row = db.session.execute(
+        select(User.id, User.username, User.email).where(User.id == user_id)
+    ).first()
+    if row is None:
+        return None
+    user = CachedUser(*row)
+    cache.set(user)
+    return user
+
+
+# Invalidation waits for the commit: dropping the entry at flush time would
+# let a concurrent request re-cache the old, still committed row.
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _collect_changed_user(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('changed_user_ids', set()).add(target.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_changed_users(session):
+    user_ids = session.info.pop('changed_user_ids', ())
+    if user_ids and has_app_context() and 'user_cache' in current_app.extensions:
+        cache = get_user_cache()
+        for user_id in user_ids:
+            cache.invalidate(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_changed_users(session):
+    session.info.pop('changed_user_ids', None)
@@ -0,0 +1,82 @@
+from datetime import datetime
+
+from .models import JobApplication
+
+REQUIRED_JOB_FIELDS = ('company', 'position')
+OPTIONAL_JOB_FIELDS = ('resume_used', 'date_applied', 'status')
+DEFAULT_STATUS = 'applied'
+
+# Text column -> max length, taken from the model so they cannot drift
+TEXT_FIELD_LENGTHS = {
+    field: JobApplication.__table__.c[field].type.length
+    for field in ('company', 'position', 'resume_used', 'status')
+}
+
+
+class JobValidationError(ValueError):
+    """Raised when a job payload is missing fields or has malformed values."""
+
+
+def parse_date(value):
+    """Parse a YYYY-MM-DD string into a date; empty values become None."""
+    if value in (None, ''):
+        return None
+    if not isinstance(value, str):
+        raise JobValidationError(f'Invalid date: {value!r}, expected YYYY-MM-DD')
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise JobValidationError(f'Invalid date: {value!r}, expected YYYY-MM-DD')
+
+
+def check_text(field, value):
+    """Reject non-string values (lists, objects, numbers) for a text column,
+    and strings longer than the column."""
+    if not isinstance(value, str):
+        raise JobValidationError(f'Field must be a string: {field}')
+    if len(value) > TEXT_FIELD_LENGTHS[field]:
+        raise JobValidationError(f'Field too long: {field} (max {TEXT_FIELD_LENGTHS[field]} characters)')
+    return value
+
+
+def job_values(data):
+    """Validate a create payload and return JobApplication column values.
+
+    Shared by single-row creation and bulk import so both paths accept and
+    reject exactly the same input. ``user_id`` is left to the caller.
+    """
+    if not isinstance(data, dict):
+        raise JobValidationError('Expected a JSON object')
+    for field in REQUIRED_JOB_FIELDS:
+        if data.get(field) in (None, ''):
+            raise JobValidationError(f'Missing field: {field}')
+    resume_used, status = data.get('resume_used'), data.get('status')
+    return {
+        'company': check_text('company', data['company']),
+        'position': check_text('position', data['position']),
+        'resume_used': check_text('resume_used', resume_used) if resume_used else None,
+        'date_applied': parse_date(data.get('date_applied')),
+        'status': check_text('status', status) if status else DEFAULT_STATUS,
+    }
+
+
+UPDATABLE_JOB_FIELDS = REQUIRED_JOB_FIELDS + OPTIONAL_JOB_FIELDS
+
+
+def job_update_values(data):
+    """Validate a partial update payload and return the columns to change."""
+    if not isinstance(data, dict):
+        raise JobValidationError('Expected a JSON object')
+    values = {}
+    for field in UPDATABLE_JOB_FIELDS:
+        if field not in data:
+            continue
+        if field in REQUIRED_JOB_FIELDS and data[field] in (None, ''):
+            raise JobValidationError(f'Field cannot be empty: {field}')
+        if field == 'date_applied':
+            values[field] = parse_date(data[field])
+        elif data[field] is None:
+            values[field] = None
+        else:
+            values[field] = check_text(field, data[field])
+    return values
@@ -0,0 +1,80 @@
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import current_app, request
+from flask_login import current_user
+from sqlalchemy import select, update
+
+from .models import db, User
+
+
+def utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+
+
+def bump_user_version(user_id):
+    """Mark the user's data as changed, in the caller's transaction.
+
+    Returns the new version, which writers stamp on the rows they touch as
+    their change sequence. The UPDATE locks the user row until commit, so
+    one user's sequence numbers commit in order.
+    """
+    return db.session.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(data_version=User.data_version + 1, updated_at=utcnow())
+        .returning(User.data_version)
+    ).scalar_one()
+
+
+def get_user_version(user_id):
+    """Return (data_version, updated_at) with a single primary-key lookup."""
+    row = db.session.execute(
+        select(User.data_version, User.updated_at).where(User.id == user_id)
+    ).first()
+    return (row[0], row[1]) if row else (0, None)
+
+
+def make_etag(scope, user_id, version):
+    # The query string is part of the key so every filter/page has its own tag
+    args = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+    digest = hashlib.sha1(f'{scope}|{request.path}|{args}'.encode()).hexdigest()[:16]
+    return f'{user_id}-{version}-{digest}'
+
+
+def conditional_get(scope):
+    """Serve 304 Not Modified from the user's data version.
+
+    The version lookup happens before the view runs, so an unchanged poll
+    never loads or serializes any job rows. Must be applied inside
+    ``login_required``.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            version, updated_at = get_user_version(current_user.id)
+            etag = make_etag(scope, current_user.id, version)
+            last_modified = updated_at.replace(tzinfo=timezone.utc) if updated_at else None
+
+            not_modified = False
+            if request.if_none_match:
+                # Weak comparison: compressed responses carry W/"..." tags
+                not_modified = request.if_none_match.contains_weak(etag)
+            elif last_modified and request.if_modified_since:
+                not_modified = last_modified <= request.if_modified_since
+
+            if not_modified:
+                response = current_app.response_class(status=304)
+            else:
+                response = view(*args, **kwargs)
+                if isinstance(response, tuple) or response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            if last_modified:
+                response.last_modified = last_modified
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapped
+    return decorator
+
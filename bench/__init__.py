@@ -0,0 +1 @@
+"""Load and latency benchmarks for the API. Run with ``python -m bench --help``."""
@@ -0,0 +1,116 @@
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import sys
+import time
+
+from .app import bench_config
+from .harness import GUNICORN_PROFILES, SCENARIOS, GunicornServer, HttpTransport, TestClientTransport, compare, run_scenarios
+from .seed import seed_database
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(prog='python -m bench', description='API load and latency benchmark.')
+    p.add_argument('--db', default='bench.sqlite3', help='SQLite file to seed/use.')
+    p.add_argument('--users', type=int, default=10000)
+    p.add_argument('--jobs', type=int, default=1000000)
+    p.add_argument('--heavy-user-jobs', type=int, default=20000,
+                   help='Rows owned by the benchmark user.')
+    p.add_argument('--skip-seed', action='store_true', help='Reuse an already seeded --db.')
+    p.add_argument('--hash-method', default='pbkdf2:sha256:1000',
+                   help='Password hash method for seeded users and the app under test.')
+    p.add_argument('--mode', choices=('testclient', 'gunicorn', 'both'), default='both')
+    p.add_argument('--requests', type=int, default=200, help='Requests per scenario.')
+    p.add_argument('--concurrency', type=int, default=4, help='Client threads for gunicorn runs.')
+    p.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                   help='Only run these scenarios (repeatable).')
+    p.add_argument('--gunicorn-profile', choices=GUNICORN_PROFILES, default='production',
+                   help="gunicorn.conf.py profile to run under ('none': gunicorn defaults).")
+    p.add_argument('--gunicorn-arg', action='append', default=[],
+                   help='Extra gunicorn argument, e.g. --gunicorn-arg=-w4 (repeatable).')
+    p.add_argument('--output', default='bench_results.json')
+    p.add_argument('--baseline', default=DEFAULT_BASELINE)
+    p.add_argument('--tolerance', type=float, default=0.2,
+                   help='Allowed fractional p95/throughput regression.')
+    p.add_argument('--update-baseline', action='store_true', help='Write results as the new baseline.')
+    return p.parse_args(argv)
+
+
+def run(args):
+    dataset = {'users': args.users, 'jobs': args.jobs, 'heavy_user_jobs': args.heavy_user_jobs}
+    if not args.skip_seed:
+        start = time.perf_counter()
+        dataset = seed_database(args.db, args.users, args.jobs, args.heavy_user_jobs, args.hash_method)
+        print(f'Seeded {args.db} in {time.perf_counter() - start:.1f}s', file=sys.stderr)
+    with sqlite3.connect(args.db) as conn:
+        # The benchmark user is always user 1; read its ids so --skip-seed works
+        job_ids = [r[0] for r in conn.execute(
+            'SELECT id FROM job_application WHERE user_id = 1 ORDER BY id LIMIT 50000')]
+    if not job_ids:
+        raise SystemExit(f'{args.db} has no applications for the benchmark user; seed it first.')
+
+    results = {}
+    if args.mode in ('testclient', 'both'):
+        from app import create_app
+        app = create_app(bench_config(args.db, PASSWORD_HASH_METHOD=args.hash_method))
+        results['testclient'] = run_scenarios(
+            lambda: TestClientTransport(app), job_ids, args.requests, 1, args.scenario)
+    if args.mode in ('gunicorn', 'both'):
+        with GunicornServer(args.db, args.gunicorn_arg, args.hash_method,
+                            args.gunicorn_profile) as server:
+            results['gunicorn'] = run_scenarios(
+                lambda: HttpTransport('127.0.0.1', server.port), job_ids,
+                args.requests, args.concurrency, args.scenario)
+
+    return {
+        'meta': {
+            'dataset': dataset,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'gunicorn_profile': args.gunicorn_profile,
+            'gunicorn_args': args.gunicorn_arg,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        },
+        'results': results,
+    }
+
+
+def print_table(report):
+    header = f'{"mode":<11}{"scenario":<20}{"req/s":>10}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"errors":>8}'
+    print(header)
+    print('-' * len(header))
+    for mode, scenarios in report['results'].items():
+        for name, r in scenarios.items():
+            print(f'{mode:<11}{name:<20}{r["rps"]:>10}{r["p50_ms"]:>10}{r["p95_ms"]:>10}{r["p99_ms"]:>10}{r["errors"]:>8}')
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = run(args)
+    print_table(report)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'Baseline written to {args.baseline}')
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f'No baseline at {args.baseline}; run with --update-baseline to create one.')
+        return 0
+    with open(args.baseline) as f:
+        regressions = compare(report, json.load(f), args.tolerance)
+    for line in regressions:
+        print('REGRESSION', line)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,27 @@
+import os
+
+from app import create_app
+from config import ProductionConfig
+
+
+def bench_config(db_path, **overrides):
+    """Production settings pointed at a seeded SQLite file, usable over plain HTTP."""
+    attrs = {
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{os.path.abspath(db_path)}',
+        'RESUME_STORAGE_DIR': os.path.abspath(db_path) + '.resumes',
+        'SESSION_COOKIE_SECURE': False,
+        'SESSION_COOKIE_SAMESITE': 'Lax',
+        'FRONTEND_ORIGIN': '*',
+        # Measure capacity, not shedding: overload would show up as 503s
+        'ADMISSION_CONTROL': False,
+    }
+    attrs.update(overrides)
+    return type('BenchConfig', (ProductionConfig,), attrs)
+
+
+def create_bench_app():
+    """App factory for gunicorn: ``gunicorn 'bench.app:create_bench_app()'``."""
+    overrides = {}
+    if os.getenv('BENCH_PASSWORD_HASH_METHOD'):
+        overrides['PASSWORD_HASH_METHOD'] = os.environ['BENCH_PASSWORD_HASH_METHOD']
+    return create_app(bench_config(os.environ['BENCH_DB_PATH'], **overrides))
@@ -0,0 +1,321 @@
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+from .seed import BENCH_PASSWORD
+
+BENCH_USER = 'bench_0'
+
+
+class TestClientTransport:
+    """Runs requests in-process through Flask's test client."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body=None, headers=None):
+        resp = self.client.open(path, method=method, data=body, headers=headers or {})
+        data = resp.get_data()
+        return resp.status_code, data
+
+
+class HttpTransport:
+    """Keep-alive HTTP/1.1 client with a minimal cookie jar."""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.conn = http.client.HTTPConnection(host, port, timeout=60)
+        self.cookies = {}
+
+    def request(self, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{k}={v}' for k, v in self.cookies.items())
+        if isinstance(body, str):
+            body = body.encode()
+        try:
+            self.conn.request(method, path, body=body, headers=headers)
+            resp = self.conn.getresponse()
+        except (http.client.HTTPException, OSError):
+            self.conn.close()
+            self.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            self.conn.request(method, path, body=body, headers=headers)
+            resp = self.conn.getresponse()
+        data = resp.read()
+        for value in resp.headers.get_all('Set-Cookie') or []:
+            name, _, rest = value.partition('=')
+            self.cookies[name.strip()] = rest.split(';', 1)[0]
+        return resp.status, data
+
+
+def _json(payload):
+    return json.dumps(payload), {'Content-Type': 'application/json'}
+
+
+class Context:
+    """Per-worker state: a logged-in transport and ids it may touch."""
+
+    def __init__(self, transport, rng, job_ids, tag):
+        self.transport = transport
+        self.rng = rng
+        self.job_ids = job_ids
+        self.tag = tag
+        self.counter = 0
+        self.resume_job = None
+
+    def login(self):
+        body, headers = _json({'username': BENCH_USER, 'password': BENCH_PASSWORD})
+        status, _ = self.transport.request('POST', '/login', body, headers)
+        if status != 200:
+            raise RuntimeError(f'Benchmark login failed with {status}')
+
+    def create_job(self):
+        body, headers = _json({'company': f'Bench {self.tag}', 'position': 'Engineer'})
+        status, data = self.transport.request('POST', '/api/jobs/', body, headers)
+        return json.loads(data)['id'] if status == 201 else None
+
+    def attach_resume(self, job_id):
+        status, _ = self.transport.request('PUT', f'/api/jobs/{job_id}/resume', _resume_body(self),
+                                           {'Content-Type': 'application/pdf'})
+        return job_id if status == 200 else None
+
+    def unique(self):
+        self.counter += 1
+        return f'{self.tag}_{self.counter}_{uuid.uuid4().hex[:12]}'
+
+
+# Each scenario builds (method, path, body, headers, expected_status) outside
+# the timed region; prepare-style work (e.g. creating a row to delete) is
+# done in the builder and is not measured.
+def _register(ctx):
+    name = ctx.unique()
+    body, headers = _json({'username': name, 'email': f'{name}@example.com', 'password': 'pw'})
+    return 'POST', '/register', body, headers, 200
+
+def _login(ctx):
+    body, headers = _json({'username': BENCH_USER, 'password': BENCH_PASSWORD})
+    return 'POST', '/login', body, headers, 200
+
+def _logout(ctx):
+    # Logging out ends the session; log back in (untimed) on the next build
+    ctx.login()
+    return 'POST', '/logout', None, None, 200
+
+def _create(ctx):
+    body, headers = _json({'company': 'Bench', 'position': 'Engineer', 'date_applied': '2024-01-01'})
+    return 'POST', '/api/jobs/', body, headers, 201
+
+def _update(ctx):
+    body, headers = _json({'status': ctx.rng.choice(['applied', 'interview', 'rejected'])})
+    return 'PUT', f'/api/jobs/{ctx.rng.choice(ctx.job_ids)}', body, headers, 200
+
+def _delete(ctx):
+    return 'DELETE', f'/api/jobs/{ctx.create_job()}', None, None, 200
+
+def _batch(ctx):
+    ids = ctx.rng.sample(ctx.job_ids, min(50, len(ctx.job_ids)))
+    body, headers = _json({'operations': [
+        {'op': 'update', 'id': i, 'fields': {'status': 'waiting'}} for i in ids]})
+    return 'POST', '/api/jobs/batch', body, headers, 200
+
+# ~100 KB; unique per upload so every PUT stores a new file
+def _resume_body(ctx):
+    return b'%PDF-1.4\n' + ctx.unique().encode() * 4000
+
+def _upload_resume(ctx):
+    return ('PUT', f'/api/jobs/{ctx.rng.choice(ctx.job_ids)}/resume', _resume_body(ctx),
+            {'Content-Type': 'application/pdf'}, 200)
+
+def _download_resume(ctx):
+    # The first 64 KB, as a PDF viewer would fetch it
+    if ctx.resume_job is None:
+        ctx.resume_job = ctx.attach_resume(ctx.job_ids[0])
+    return 'GET', f'/api/jobs/{ctx.resume_job}/resume', None, {'Range': 'bytes=0-65535'}, 206
+
+def _delete_resume(ctx):
+    return 'DELETE', f'/api/jobs/{ctx.attach_resume(ctx.create_job())}/resume', None, None, 200
+
+def _import(ctx):
+    rows = ''.join(json.dumps({'company': f'Imported {i}', 'position': 'Eng'}) + '\n' for i in range(100))
+    return 'POST', '/api/jobs/import', rows, {'Content-Type': 'application/x-ndjson'}, 200
+
+
+SCENARIOS = {
+    'auth.register': _register,
+    'auth.login': _login,
+    'auth.logout': _logout,
+    'auth.me': lambda ctx: ('GET', '/api/me', None, None, 200),
+    'jobs.list_page': lambda ctx: ('GET', '/api/jobs/?limit=50&sort=-date_applied', None, None, 200),
+    'jobs.list_filtered': lambda ctx: ('GET', '/api/jobs/?limit=50&status=interview', None, None, 200),
+    'jobs.list_full': lambda ctx: ('GET', '/api/jobs/', None, None, 200),
+    'jobs.export': lambda ctx: ('GET', '/api/jobs/export?format=ndjson', None, None, 200),
+    'jobs.stats': lambda ctx: ('GET', '/api/jobs/stats', None, None, 200),
+    'jobs.search': lambda ctx: ('GET', '/api/jobs/search?q=acme+eng', None, None, 200),
+    'jobs.suggest': lambda ctx: ('GET', '/api/jobs/search/suggest?field=company&q=gl', None, None, 200),
+    'jobs.changes': lambda ctx: ('GET', '/api/jobs/changes?limit=100', None, None, 200),
+    'jobs.create': _create,
+    'jobs.update': _update,
+    'jobs.delete': _delete,
+    'jobs.batch': _batch,
+    'jobs.import': _import,
+    'jobs.upload_resume': _upload_resume,
+    'jobs.download_resume': _download_resume,
+    'jobs.delete_resume': _delete_resume,
+}
+
+# Expensive scenarios run fewer iterations so a full pass stays practical
+HEAVY = {'jobs.list_full': 0.05, 'jobs.export': 0.05, 'jobs.import': 0.2, 'auth.register': 0.5,
+         'auth.login': 0.5}
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(latencies, errors, wall):
+    latencies = sorted(latencies)
+    count = len(latencies)
+    return {
+        'count': count,
+        'errors': errors,
+        'rps': round(count / wall, 2) if wall else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def _worker(ctx, build, iterations, latencies, errors, lock):
+    local, failed = [], 0
+    for _ in range(iterations):
+        method, path, body, headers, expected = build(ctx)
+        start = time.perf_counter()
+        status, _ = ctx.transport.request(method, path, body, headers)
+        elapsed = time.perf_counter() - start
+        local.append(elapsed)
+        if status != expected:
+            failed += 1
+    with lock:
+        latencies.extend(local)
+        errors[0] += failed
+
+
+def run_scenarios(make_transport, job_ids, requests, concurrency, names=None, seed=0):
+    """Run each scenario with ``concurrency`` workers; return per-scenario summaries."""
+    contexts = []
+    for i in range(concurrency):
+        ctx = Context(make_transport(), random.Random(seed + i), job_ids, f'w{i}')
+        ctx.login()
+        contexts.append(ctx)
+    results = {}
+    for name in names or SCENARIOS:
+        build = SCENARIOS[name]
+        total = max(int(requests * HEAVY.get(name, 1.0)), concurrency)
+        per_worker = max(total // concurrency, 1)
+        latencies, errors, lock = [], [0], threading.Lock()
+        threads = [threading.Thread(target=_worker, args=(ctx, build, per_worker, latencies, errors, lock))
+                   for ctx in contexts]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        results[name] = summarize(latencies, errors[0], time.perf_counter() - start)
+        if name == 'auth.logout':
+            for ctx in contexts:
+                ctx.login()
+    return results
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+GUNICORN_PROFILES = ('production', 'development', 'none')
+
+
+class GunicornServer:
+    """Local gunicorn process serving the bench app on a free port.
+
+    ``profile`` picks the gunicorn.conf.py profile explicitly (FLASK_ENV is
+    set for the subprocess), or ``none`` for gunicorn's own defaults; the
+    config file is otherwise loaded implicitly from the repo root.
+    """
+
+    def __init__(self, db_path, extra_args=(), hash_method=None, profile='production'):
+        if profile not in GUNICORN_PROFILES:
+            raise ValueError(f'Unknown gunicorn profile: {profile}')
+        self.port = _free_port()
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ, BENCH_DB_PATH=os.path.abspath(db_path))
+        if hash_method:
+            env['BENCH_PASSWORD_HASH_METHOD'] = hash_method
+        if profile == 'none':
+            config = os.devnull
+        else:
+            config = os.path.join(root, 'gunicorn.conf.py')
+            env.update(FLASK_ENV=profile, FLASK_DEBUG='0')
+        cmd = [sys.executable, '-m', 'gunicorn', '-c', config, '-b', f'127.0.0.1:{self.port}',
+               *extra_args, 'bench.app:create_bench_app()']
+        self.proc = subprocess.Popen(cmd, env=env, cwd=root,
+                                     stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+    def wait_ready(self, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.proc.poll() is not None:
+                raise RuntimeError('gunicorn exited: ' + self.proc.stderr.read().decode()[-2000:])
+            try:
+                with socket.create_connection(('127.0.0.1', self.port), timeout=0.5):
+                    return
+            except OSError:
+                time.sleep(0.1)
+        raise RuntimeError('gunicorn did not start in time')
+
+    def stop(self):
+        self.proc.terminate()
+        try:
+            self.proc.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+
+    def __enter__(self):
+        self.wait_ready()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def compare(results, baseline, tolerance):
+    """List regressions of ``results`` against ``baseline``.
+
+    A scenario regresses when it has errors, its p95 grows or its
+    throughput drops by more than ``tolerance`` (a fraction).
+    """
+    regressions = []
+    for mode, scenarios in results.get('results', {}).items():
+        base_mode = baseline.get('results', {}).get(mode, {})
+        for name, current in scenarios.items():
+            if current['errors']:
+                regressions.append(f'{mode}/{name}: {current["errors"]} failed requests')
+            base = base_mode.get(name)
+            if not base:
+                continue
+            if base['p95_ms'] and current['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+                regressions.append(f'{mode}/{name}: p95 {current["p95_ms"]}ms > baseline {base["p95_ms"]}ms')
+            if base['rps'] and current['rps'] < base['rps'] * (1 - tolerance):
+                regressions.append(f'{mode}/{name}: {current["rps"]} req/s < baseline {base["rps"]} req/s')
+    return regressions
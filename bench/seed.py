@@ -0,0 +1,92 @@
+import random
+import sqlite3
+from datetime import date, timedelta
+
+from werkzeug.security import generate_password_hash
+
+from app import create_app, db
+from app.search import get_search_backend
+from app.stats import rebuild_stats
+
+from .app import bench_config
+
+BENCH_PASSWORD = 'benchpass'
+STATUSES = ('applied', 'waiting', 'rejected', 'interview', 'hired')
+COMPANIES = ('Acme', 'Globex', 'Initech', 'Umbrella', 'Hooli', 'Stark', 'Wayne', 'Wonka',
+             'Cyberdyne', 'Soylent', 'Tyrell', 'Aperture', 'Vandelay', 'Dunder', 'Pied Piper')
+POSITIONS = ('Backend Engineer', 'Frontend Engineer', 'Data Engineer', 'SRE', 'Analyst',
+             'Product Manager', 'Designer', 'QA Engineer', 'Data Scientist', 'Architect')
+INSERT_BATCH = 10000
+
+
+def _job_rows(rng, user_id, count, start_id):
+    start = date(2020, 1, 1)
+    for i in range(count):
+        yield (
+            start_id + i,
+            f'{rng.choice(COMPANIES)} {rng.randrange(1000)}',
+            rng.choice(POSITIONS),
+            f'resume_v{rng.randrange(5)}.pdf',
+            (start + timedelta(days=rng.randrange(2000))).isoformat(),
+            rng.choice(STATUSES),
+            user_id,
+        )
+
+
+def seed_database(path, users=10000, jobs=1000000, heavy_user_jobs=20000,
+                  hash_method='pbkdf2:sha256:1000', seed=0):
+    """Create a SQLite file with ``users`` users and ``jobs`` applications.
+
+    User 1 ('bench_0') is the heavy tenant the scenarios log in as and owns
+    ``heavy_user_jobs`` rows; the rest are spread uniformly over the others.
+    Rows are written with raw executemany batches, then the search index and
+    JobStat summaries are rebuilt through the app's own code paths.
+    """
+    app = create_app(bench_config(path, PASSWORD_HASH_METHOD=hash_method))
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.remove()
+        db.engine.dispose()
+
+    rng = random.Random(seed)
+    pwhash = generate_password_hash(BENCH_PASSWORD, hash_method)
+    heavy_user_jobs = min(heavy_user_jobs, jobs)
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute('PRAGMA journal_mode=OFF')
+        conn.execute('PRAGMA synchronous=OFF')
+        conn.executemany(
+            'INSERT INTO user (id, username, email, password, data_version) VALUES (?, ?, ?, ?, 0)',
+            ((i + 1, f'bench_{i}', f'bench_{i}@example.com', pwhash) for i in range(users)),
+        )
+        remaining = jobs - heavy_user_jobs
+        others = max(users - 1, 1)
+        next_id = 1
+        batch = []
+        plan = [(1, heavy_user_jobs)] + [
+            (uid, remaining // others + (1 if uid - 2 < remaining % others else 0))
+            for uid in range(2, users + 1)
+        ]
+        for user_id, count in plan:
+            for row in _job_rows(rng, user_id, count, next_id):
+                batch.append(row)
+                if len(batch) >= INSERT_BATCH:
+                    conn.executemany('INSERT INTO job_application (id, company, position, resume_used, '
+                                     'date_applied, status, user_id) VALUES (?, ?, ?, ?, ?, ?, ?)', batch)
+                    batch = []
+            next_id += count
+        if batch:
+            conn.executemany('INSERT INTO job_application (id, company, position, resume_used, '
+                             'date_applied, status, user_id) VALUES (?, ?, ?, ?, ?, ?, ?)', batch)
+        conn.commit()
+    finally:
+        conn.close()
+
+    with app.app_context():
+        get_search_backend().rebuild()
+        db.session.commit()
+        rebuild_stats()
+        db.session.remove()
+        db.engine.dispose()
+    return {'users': users, 'jobs': jobs, 'heavy_user_jobs': heavy_user_jobs}
@@ -8,6 +8,20 @@ class Config:
     SECRET_KEY = os.getenv("SECRET_KEY", "fallback_dev_key")
     SQLALCHEMY_DATABASE_URI = os.getenv("SQLALCHEMY_DATABASE_URI", "sqlite:///db.sqlite3")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Optional read replicas (comma-separated absolute URIs). Read-only views
+    # use them; a client stays on the primary for REPLICA_STICKY_SECONDS after
+    # a write so it always reads its own changes.
+    SQLALCHEMY_REPLICA_URIS = [u for u in os.getenv("SQLALCHEMY_REPLICA_URIS", "").split(",") if u]
+    REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+    REPLICA_HEALTH_CHECK_INTERVAL = int(os.getenv("REPLICA_HEALTH_CHECK_INTERVAL", "10"))
+
+    # Optional sharding of job data by user id (comma-separated URIs; order
+    # matters, append to grow). Users and sessions stay on the primary.
+    # Shard i allocates job ids i, i + SHARD_ID_STRIDE, ...; the stride caps
+    # the number of shards and must never change once data exists.
+    SQLALCHEMY_SHARD_URIS = [u for u in os.getenv("SQLALCHEMY_SHARD_URIS", "").split(",") if u]
+    SHARD_ID_STRIDE = 16
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = os.getenv("SESSION_COOKIE_SAMESITE", "Lax")
     SESSION_COOKIE_SECURE = os.getenv("SESSION_COOKIE_SECURE", "False").lower() == "true"
@@ -15,6 +29,106 @@ class Config:
     # Common settings
     JSON_SORT_KEYS = False
     JSONIFY_PRETTYPRINT_REGULAR = False
+    # Serialize responses with orjson when installed (falls back to stdlib json)
+    JSON_FAST_PROVIDER = os.getenv("JSON_FAST_PROVIDER", "True").lower() == "true"
+
+    # Startup: print per-phase create_app timings, and check the stored schema
+    # version (one SELECT; create_all only when it changed) at boot
+    STARTUP_PROFILE = os.getenv("STARTUP_PROFILE", "False").lower() == "true"
+    SCHEMA_CHECK_ON_STARTUP = os.getenv("SCHEMA_CHECK_ON_STARTUP", "False").lower() == "true"
+
+    # Response compression: negotiated from Accept-Encoding (br needs the
+    # optional brotli package); only listed content types are compressed.
+    COMPRESS_ENABLED = os.getenv("COMPRESS_ENABLED", "True").lower() == "true"
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+    COMPRESS_ALGORITHMS = ("br", "gzip", "deflate")
+    COMPRESS_LEVELS = {
+        "application/json": 6,
+        "application/x-ndjson": 6,
+        "text/csv": 6,
+        "text/plain": 6,
+    }
+
+    # Metrics: /metrics is open unless METRICS_TOKEN is set (then Bearer auth).
+    # With METRICS_REQUIRE_TOKEN and no token configured it is not served.
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+    METRICS_REQUIRE_TOKEN = os.getenv("METRICS_REQUIRE_TOKEN", "False").lower() == "true"
+    METRICS_SERVER_TIMING = os.getenv("METRICS_SERVER_TIMING", "False").lower() == "true"
+    SQL_SLOW_QUERY_SECONDS = float(os.getenv("SQL_SLOW_QUERY_SECONDS", "0.25"))
+
+    # Admission control: per-process in-flight limits and pool checkout wait
+    # (seconds, recent average) past which a route class gets a fast 503.
+    # Endpoints not listed are 'default'; a class of None is never shed.
+    ADMISSION_CONTROL = os.getenv("ADMISSION_CONTROL", "True").lower() == "true"
+    ADMISSION_ROUTE_CLASSES = {
+        "auth.login": "expensive",
+        "auth.register": "expensive",
+        "jobs.export_jobs": "expensive",
+        "jobs.import_jobs_route": "expensive",
+        "jobs.upload_resume": "expensive",
+        "jobs.get_jobs": "read",
+        "auth.get_current_user": "read",
+        "metrics.metrics_endpoint": None,
+    }
+    ADMISSION_MAX_IN_FLIGHT = {
+        "expensive": int(os.getenv("ADMISSION_EXPENSIVE_MAX_IN_FLIGHT", "4")),
+        "read": int(os.getenv("ADMISSION_READ_MAX_IN_FLIGHT", "64")),
+        "default": int(os.getenv("ADMISSION_DEFAULT_MAX_IN_FLIGHT", "16")),
+    }
+    ADMISSION_MAX_POOL_WAIT = {"expensive": 0.05, "read": 0.5, "default": 0.2}
+    ADMISSION_POOL_WAIT_WINDOW = 2.0
+    ADMISSION_RETRY_AFTER = 1
+
+    # Authenticated user identity cache (USER_CACHE_BACKEND: shared get/set/delete store)
+    USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "60"))
+    USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+    USER_CACHE_BACKEND = None
+
+    # Password hashing: full Werkzeug method string (algorithm and cost).
+    # Hashes made with any other method are upgraded on the next login.
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    PASSWORD_HASH_SALT_LENGTH = 16
+    # Worker processes for hashing (0 = hash inline) and max queued operations.
+    # The pool only helps threaded (gthread) workers; use 0 with sync workers.
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+
+    # Job list pagination: None returns the full list unless ?limit= is given
+    JOBS_DEFAULT_PAGE_SIZE = None
+    JOBS_MAX_PAGE_SIZE = int(os.getenv("JOBS_MAX_PAGE_SIZE", "500"))
+
+    # Bulk import: rows per multi-row INSERT/transaction and error report cap
+    JOBS_IMPORT_CHUNK_SIZE = int(os.getenv("JOBS_IMPORT_CHUNK_SIZE", "500"))
+    JOBS_IMPORT_MAX_CHUNK_SIZE = 5000
+    JOBS_IMPORT_MAX_ERRORS = 1000
+
+    # Change feed: how long delete tombstones are kept (flask compact-tombstones)
+    JOBS_TOMBSTONE_RETENTION_DAYS = int(os.getenv("JOBS_TOMBSTONE_RETENTION_DAYS", "30"))
+
+    # Search: deepest offset allowed for ranked result pages
+    JOBS_SEARCH_MAX_OFFSET = 1000
+
+    # Resume files: content-addressed storage (RESUME_STORAGE_BACKEND: an
+    # object like app.resumes.LocalFileStorage), upload limits, and how long
+    # unreferenced files survive before flask gc-resumes removes them
+    RESUME_STORAGE_DIR = os.getenv("RESUME_STORAGE_DIR", "resume_files")
+    RESUME_STORAGE_BACKEND = None
+    RESUME_MAX_BYTES = int(os.getenv("RESUME_MAX_BYTES", str(10 * 1024 * 1024)))
+    RESUME_CONTENT_TYPES = (
+        "application/pdf",
+        "application/msword",
+        "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        "application/vnd.oasis.opendocument.text",
+        "application/rtf",
+        "text/plain",
+    )
+    RESUME_GC_GRACE_HOURS = int(os.getenv("RESUME_GC_GRACE_HOURS", "24"))
+
+    # Batch update/delete: max operations per request
+    JOBS_BATCH_MAX_OPERATIONS = int(os.getenv("JOBS_BATCH_MAX_OPERATIONS", "1000"))
+
+    # Export: rows fetched from the database cursor per streamed chunk
+    JOBS_EXPORT_CHUNK_SIZE = int(os.getenv("JOBS_EXPORT_CHUNK_SIZE", "1000"))
 
 class DevelopmentConfig(Config):
     """Development environment configuration"""
@@ -23,6 +137,7 @@ class DevelopmentConfig(Config):
     
     # Development-specific settings
     SQLALCHEMY_ECHO = True  # Log SQL queries
+    METRICS_SERVER_TIMING = True
     JSONIFY_PRETTYPRINT_REGULAR = True  # Pretty print JSON responses
     
     # Development CORS settings
@@ -43,6 +158,7 @@ class ProductionConfig(Config):
     SESSION_COOKIE_SECURE = True
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = "None"
+    METRICS_REQUIRE_TOKEN = True
 
 class TestingConfig(Config):
     """Testing environment configuration"""
@@ -54,4 +170,6 @@ class TestingConfig(Config):
     
     # Testing-specific settings
     WTF_CSRF_ENABLED = False
+    PASSWORD_HASH_METHOD = "pbkdf2:sha256:1000"  # cheap hashes keep tests fast
+    PASSWORD_HASH_WORKERS = 0
     FRONTEND_ORIGIN = "*" 
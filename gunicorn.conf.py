@@ -0,0 +1,63 @@
+"""Gunicorn settings, loaded automatically from the project root.
+
+Profiles follow FLASK_ENV/FLASK_DEBUG the same way create_app picks its
+config (development when unset), and every value can be overridden with
+the GUNICORN_* variables below.
+See the Deployment section of context.md for how the defaults were chosen.
+"""
+import gc
+import multiprocessing
+import os
+
+_env = os.getenv("FLASK_ENV", "development").lower()
+_debug = os.getenv("FLASK_DEBUG", "0").lower() in ("1", "true", "yes")
+# Same test create_app uses to choose ProductionConfig
+_development = not (_env == "production" or (not _debug and _env != "development"))
+_cpus = multiprocessing.cpu_count()
+
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+
+if _development:
+    worker_class = os.getenv("GUNICORN_WORKER_CLASS", "sync")
+    workers = int(os.getenv("GUNICORN_WORKERS", "1"))
+    threads = int(os.getenv("GUNICORN_THREADS", "1"))
+    reload = True
+    preload_app = False  # reload and preload don't mix
+else:
+    # The API is I/O bound (database round trips), so a few threads per
+    # process overlap waits without the memory cost of more processes.
+    worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+    workers = int(os.getenv("GUNICORN_WORKERS", os.getenv("WEB_CONCURRENCY", min(2 * _cpus + 1, 8))))
+    threads = int(os.getenv("GUNICORN_THREADS", "4"))
+    # Import the app once in the master; workers share its pages copy-on-write
+    preload_app = os.getenv("GUNICORN_PRELOAD", "True").lower() == "true"
+
+# A sync worker serves one request at a time, so a password hashing pool
+# (app/passwords.py) would only add IPC; hash inline unless told otherwise.
+if worker_class == "sync" and threads <= 1:
+    os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
+
+# Recycle workers gradually to bound leaks, with jitter so they don't all
+# restart at once, and give in-flight requests time to finish on shutdown.
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "200"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+accesslog = os.getenv("GUNICORN_ACCESSLOG", "-")
+
+
+def when_ready(server):
+    # Move everything allocated while preloading into the permanent
+    # generation so the collector doesn't touch (and un-share) those pages.
+    if preload_app:
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    # Connections opened in the master must not be shared with children;
+    # drop the pools without closing the parent's sockets.
+    if preload_app:
+        from app import reset_after_fork
+        reset_after_fork(server.app.wsgi())
@@ -1,7 +1,10 @@
 from app import create_app, db
+from app.schema import SCHEMA_VERSION, ensure_schema
 
 app = create_app()
 
 with app.app_context():
-    db.create_all()
-    print('Database tables created.') 
\ No newline at end of file
+    if ensure_schema():
+        print(f'Database migrated to schema version {SCHEMA_VERSION}.')
+    else:
+        print(f'Schema is up to date (version {SCHEMA_VERSION}).')
@@ -1,2 +1,2 @@
 #! /bin/bash
-gunicorn wsgi:app
\ No newline at end of file
+exec gunicorn -c gunicorn.conf.py wsgi:app
@@ -220,3 +220,819 @@ def test_cors_blocks_disallowed_origin():
         )
         # Should not include CORS headers for disallowed origin
         assert resp.headers.get("Access-Control-Allow-Origin") is None
+
+def _page_through(client, query):
+    seen, cursor = [], None
+    while True:
+        url = f"/api/jobs/?{query}" + (f"&cursor={cursor}" if cursor else "")
+        resp = client.get(url)
+        assert resp.status_code == 200
+        seen.extend(resp.get_json())
+        cursor = resp.headers.get("X-Next-Cursor")
+        if not cursor:
+            return seen
+
+def test_jobs_keyset_pagination(logged_in_client):
+    dates = ["2024-01-03", None, "2024-01-01", "2024-01-03", None, "2024-01-02", "2024-01-01"]
+    for i, d in enumerate(dates):
+        logged_in_client.post("/api/jobs/", json={
+            "company": f"Co{i % 3}", "position": "Eng", "date_applied": d,
+            "status": "applied" if i % 2 else "rejected"
+        })
+    full = logged_in_client.get("/api/jobs/?sort=date_applied").get_json()
+    assert len(full) == len(dates)
+    # NULLs first ascending and last descending, ties broken on id
+    assert [j["id"] for j in full][:2] == [2, 5]
+    newest = logged_in_client.get("/api/jobs/?sort=-date_applied").get_json()
+    assert [j["id"] for j in newest] == [4, 1, 6, 7, 3, 5, 2]
+    for sort in ["id", "-id", "date_applied", "-date_applied", "company", "-company"]:
+        expected = logged_in_client.get(f"/api/jobs/?sort={sort}").get_json()
+        paged = _page_through(logged_in_client, f"sort={sort}&limit=2")
+        assert [j["id"] for j in paged] == [j["id"] for j in expected]
+        assert len({j["id"] for j in paged}) == len(dates)
+
+def test_jobs_filters(logged_in_client):
+    for i, d in enumerate(["2024-01-01", "2024-02-01", "2024-03-01"]):
+        logged_in_client.post("/api/jobs/", json={
+            "company": "Acme" if i else "Globex", "position": "Eng",
+            "date_applied": d, "status": ["applied", "interview", "rejected"][i]
+        })
+    assert len(logged_in_client.get("/api/jobs/?status=applied,rejected").get_json()) == 2
+    assert len(logged_in_client.get("/api/jobs/?company=Acme").get_json()) == 2
+    jobs = logged_in_client.get("/api/jobs/?date_from=2024-01-15&date_to=2024-02-15").get_json()
+    assert [j["status"] for j in jobs] == ["interview"]
+
+def test_jobs_invalid_list_params(logged_in_client):
+    assert logged_in_client.get("/api/jobs/?limit=abc").status_code == 400
+    assert logged_in_client.get("/api/jobs/?sort=password").status_code == 400
+    assert logged_in_client.get("/api/jobs/?cursor=garbage&limit=1").status_code == 400
+    # Tampered cursors: values of the wrong type never reach the query
+    import base64, json
+    for payload in (["company", ["x"], 1], ["company", {"a": 1}, 1], ["company", None, 1],
+                    ["date_applied", 5, 1], ["id", "1", 1], ["company", "x", "1"], ["id", 1, True]):
+        cursor = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+        sort = payload[0]
+        resp = logged_in_client.get(f"/api/jobs/?sort={sort}&limit=1&cursor={cursor}")
+        assert resp.status_code == 400 and resp.get_json() == {"error": "Invalid cursor"}, payload
+    assert logged_in_client.get("/api/jobs/?date_from=01/02/2024").status_code == 400
+
+def test_jobs_import_csv(logged_in_client):
+    body = (
+        "company,position,resume_used,date_applied,status\n"
+        "Acme,Engineer,cv.pdf,2024-01-01,applied\n"
+        ",Missing Company,,,\n"
+        "Globex,\"Dev, Backend\",,2024-13-01,\n"
+        "Initech,Analyst,,,interview\n"
+        "Hooli,SRE,,2024-02-02,\n"
+    )
+    resp = logged_in_client.post("/api/jobs/import?chunk_size=2", data=body,
+                                 content_type="text/csv")
+    assert resp.status_code == 200
+    report = resp.get_json()
+    assert report["imported"] == 3
+    assert report["failed"] == 2
+    assert [e["line"] for e in report["errors"]] == [3, 4]
+    jobs = logged_in_client.get("/api/jobs/").get_json()
+    assert [j["company"] for j in jobs] == ["Acme", "Initech", "Hooli"]
+    assert jobs[2]["status"] == "applied"
+
+def test_jobs_import_ndjson(logged_in_client):
+    body = (
+        '{"company": "Acme", "position": "Eng", "date_applied": "2024-01-01"}\n'
+        "\n"
+        "not json\n"
+        '{"position": "Eng"}\n'
+        '{"company": "Globex", "position": "Eng"}\n'
+        '{"company": {"name": "Initech"}, "position": "Eng"}\n'
+        '{"company": "Hooli", "position": "' + "x" * 151 + '"}\n'
+        '{"company": "Umbrella", "position": "Eng", "status": 3}\n'
+        '{"company": "Stark", "position": "Eng"}'
+    )
+    resp = logged_in_client.post("/api/jobs/import?chunk_size=2", data=body,
+                                 content_type="application/x-ndjson")
+    report = resp.get_json()
+    assert report["imported"] == 3
+    assert [e["line"] for e in report["errors"]] == [3, 4, 6, 7, 8]
+    assert "Missing field: company" in report["errors"][1]["error"]
+    assert report["errors"][2]["error"] == "Field must be a string: company"
+    assert report["errors"][3]["error"] == "Field too long: position (max 150 characters)"
+    companies = [j["company"] for j in logged_in_client.get("/api/jobs/").get_json()]
+    assert companies == ["Acme", "Globex", "Stark"]
+
+def test_jobs_import_rejects_unknown_format(logged_in_client):
+    resp = logged_in_client.post("/api/jobs/import", data="x", content_type="text/plain")
+    assert resp.status_code == 400
+
+def test_jobs_create_invalid_date(logged_in_client):
+    resp = logged_in_client.post("/api/jobs/", json={
+        "company": "Acme", "position": "Eng", "date_applied": "yesterday"
+    })
+    assert resp.status_code == 400
+
+def test_jobs_export(app, logged_in_client):
+    app.config["JOBS_EXPORT_CHUNK_SIZE"] = 2
+    for i in range(5):
+        logged_in_client.post("/api/jobs/", json={
+            "company": f"Co, {i}", "position": "Eng", "date_applied": "2024-01-0%d" % (i + 1)
+        })
+    resp = logged_in_client.get("/api/jobs/export?format=csv")
+    assert resp.status_code == 200
+    assert resp.is_streamed
+    assert resp.mimetype == "text/csv"
+    import csv, io
+    rows = list(csv.DictReader(io.StringIO(resp.get_data(as_text=True))))
+    assert [r["company"] for r in rows] == [f"Co, {i}" for i in range(5)]
+    assert rows[0]["date_applied"] == "2024-01-01"
+
+    resp = logged_in_client.get("/api/jobs/export?format=ndjson")
+    import json
+    lines = [json.loads(l) for l in resp.get_data(as_text=True).splitlines()]
+    assert len(lines) == 5 and lines[4]["company"] == "Co, 4"
+    assert logged_in_client.get("/api/jobs/export?format=xml").status_code == 400
+
+def test_jobs_stats_maintained(app, logged_in_client):
+    ids = []
+    for d, status in [("2024-01-01", "applied"), ("2024-01-02", "interview"),
+                      ("2024-02-05", "hired"), (None, "rejected")]:
+        resp = logged_in_client.post("/api/jobs/", json={
+            "company": "Acme", "position": "Eng", "date_applied": d, "status": status
+        })
+        ids.append(resp.get_json()["id"])
+    logged_in_client.post("/api/jobs/import", data="company,position,date_applied\nX,Y,2024-02-06\n",
+                          content_type="text/csv")
+    logged_in_client.put(f"/api/jobs/{ids[0]}", json={"status": "interview", "date_applied": "2024-03-01"})
+    logged_in_client.delete(f"/api/jobs/{ids[3]}")
+
+    stats = logged_in_client.get("/api/jobs/stats").get_json()
+    assert stats["total"] == 4
+    assert stats["by_status"] == {"interview": 2, "hired": 1, "applied": 1}
+    assert stats["monthly"] == {"2024-01": 1, "2024-02": 2, "2024-03": 1}
+    assert stats["weekly"]["2024-W06"] == 2
+    assert stats["funnel"]["reached"] == {"applied": 4, "interview": 3, "hired": 1}
+    assert stats["funnel"]["conversion"]["applied_to_interview"] == 0.75
+
+    from app.models import JobStat
+    from app.stats import rebuild_stats
+    JobStat.query.delete()
+    db.session.commit()
+    rebuild_stats()
+    assert logged_in_client.get("/api/jobs/stats").get_json() == stats
+
+def test_jobs_conditional_get(logged_in_client):
+    logged_in_client.post("/api/jobs/", json={"company": "Acme", "position": "Eng"})
+    resp = logged_in_client.get("/api/jobs/")
+    etag = resp.headers["ETag"]
+    assert resp.headers.get("Last-Modified")
+    resp = logged_in_client.get("/api/jobs/", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.get_data() == b""
+    # A different page or filter has its own tag
+    other = logged_in_client.get("/api/jobs/?limit=1").headers["ETag"]
+    assert other != etag
+    # Writes invalidate the tag
+    logged_in_client.post("/api/jobs/", json={"company": "Globex", "position": "Eng"})
+    resp = logged_in_client.get("/api/jobs/", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert len(resp.get_json()) == 2
+
+def test_me_conditional_get(logged_in_client):
+    resp = logged_in_client.get("/api/me")
+    resp = logged_in_client.get("/api/me", headers={"If-None-Match": resp.headers["ETag"]})
+    assert resp.status_code == 304
+    logged_in_client.post("/api/jobs/", json={"company": "Acme", "position": "Eng"})
+    resp = logged_in_client.get("/api/me", headers={
+        "If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"})
+    assert resp.status_code == 304
+    resp = logged_in_client.get("/api/me", headers={
+        "If-Modified-Since": "Fri, 01 Jan 2010 00:00:00 GMT"})
+    assert resp.status_code == 200
+
+def test_user_loader_cache(app, logged_in_client):
+    from app.models import User
+    from app.user_cache import get_user_cache
+    from app.routes import load_user
+    cache = get_user_cache()
+    user = User.query.filter_by(username="bob").first()
+    cache.clear()
+    before = cache.stats()
+    for _ in range(3):
+        assert load_user(str(user.id)).username == "bob"
+    after = cache.stats()
+    assert after["misses"] == before["misses"] + 1
+    assert after["hits"] == before["hits"] + 2
+    assert load_user("not-an-id") is None
+    # Changing the user record invalidates the cached identity
+    user.email = "robert@example.com"
+    db.session.commit()
+    assert load_user(str(user.id)).email == "robert@example.com"
+    # ...but only once committed: a flushed or rolled back change keeps it
+    user.email = "bobby@example.com"
+    db.session.flush()
+    assert cache.get(user.id).email == "robert@example.com"
+    db.session.rollback()
+    assert cache.get(user.id).email == "robert@example.com"
+    db.session.commit()
+    assert cache.get(user.id).email == "robert@example.com"
+
+def test_user_cache_shared_backend():
+    from app.user_cache import CachedUser, LocalBackend, UserCache
+    backend = LocalBackend()
+    worker_a = UserCache(ttl=60, max_size=2, backend=backend)
+    worker_b = UserCache(ttl=60, max_size=2, backend=backend)
+    worker_a.set(CachedUser(1, "bob", "bob@example.com"))
+    assert worker_b.get(1).username == "bob"
+    assert worker_b.stats()["backend_hits"] == 1
+    # No per-process copy: an invalidation in one worker reaches the others
+    worker_a.invalidate(1)
+    assert worker_b.get(1) is None
+    # Without a backend the local LRU is bounded: the oldest entry is evicted
+    local = UserCache(ttl=60, max_size=2)
+    for i in range(2, 5):
+        local.set(CachedUser(i, f"u{i}", f"u{i}@example.com"))
+    assert local.stats()["size"] == 2 and local.get(2) is None
+
+def test_login_upgrades_outdated_hash(app, client):
+    from werkzeug.security import generate_password_hash
+    from app.models import User
+    db.session.add(User(username="old", email="old@example.com",
+                        password=generate_password_hash("pw", "pbkdf2:sha256:500")))
+    db.session.commit()
+    resp = client.post("/login", json={"username": "old", "password": "pw"})
+    assert resp.status_code == 200
+    user = User.query.filter_by(username="old").first()
+    assert user.password.startswith(app.config["PASSWORD_HASH_METHOD"] + "$")
+    assert client.post("/logout").status_code == 200
+    assert client.post("/login", json={"username": "old", "password": "pw"}).status_code == 200
+
+def test_password_hasher_pool_and_queue_limit():
+    from app.passwords import HashQueueFull, PasswordHasher
+    hasher = PasswordHasher("pbkdf2:sha256:1000", workers=1, max_pending=1)
+    pwhash = hasher.hash("secret")
+    assert hasher.verify(pwhash, "secret")
+    assert not hasher.verify(pwhash, "wrong")
+    metrics = hasher.metrics()
+    assert metrics["hash"]["count"] == 1 and metrics["verify"]["count"] == 2
+    hasher._slots.acquire()
+    with pytest.raises(HashQueueFull):
+        hasher.hash("secret")
+    assert hasher.metrics()["rejected"] == 1
+
+def test_password_hasher_short_method_is_not_rehashed():
+    from app.passwords import PasswordHasher
+    hasher = PasswordHasher("scrypt")  # Werkzeug expands this to scrypt:32768:8:1
+    assert not hasher.needs_rehash(hasher.hash("pw"))
+    assert hasher.needs_rehash(PasswordHasher("pbkdf2:sha256:1000").hash("pw"))
+
+def test_login_busy_returns_503(app, client):
+    from app.passwords import get_password_hasher
+    client.post("/register", json={"username": "a", "email": "a@x.com", "password": "pw"})
+    hasher = get_password_hasher()
+    for _ in range(hasher.max_pending):
+        hasher._slots.acquire()
+    resp = client.post("/login", json={"username": "a", "password": "pw"})
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == "1"
+
+def test_jobs_batch(logged_in_client):
+    ids = [logged_in_client.post("/api/jobs/", json={
+        "company": f"Co{i}", "position": "Eng", "status": "applied"
+    }).get_json()["id"] for i in range(4)]
+    resp = logged_in_client.post("/api/jobs/batch", json={"operations": [
+        {"op": "update", "id": ids[0], "fields": {"status": "rejected"}},
+        {"op": "update", "id": ids[1], "fields": {"status": "rejected"}},
+        {"op": "update", "id": ids[2], "fields": {"date_applied": "2024-05-01"}},
+        {"op": "delete", "id": ids[3]},
+        {"op": "delete", "id": 9999},
+        {"op": "update", "id": ids[0], "fields": {"status": "hired"}},
+        {"op": "update", "id": ids[1], "fields": {"company": ""}},
+        {"op": "archive", "id": ids[1]},
+        {"op": "update", "id": 9998, "fields": {"status": ["hired"]}},
+        {"op": "update", "id": 9997, "fields": {"resume_used": {"name": "cv.pdf"}}},
+    ]})
+    assert resp.status_code == 200
+    results = resp.get_json()["results"]
+    statuses = [r["status"] for r in results]
+    assert statuses == ["ok", "ok", "ok", "ok", "not_found"] + ["invalid"] * 5
+    assert results[-1]["error"] == "Field must be a string: resume_used"
+    jobs = {j["id"]: j for j in logged_in_client.get("/api/jobs/").get_json()}
+    assert set(jobs) == set(ids[:3])
+    assert jobs[ids[0]]["status"] == jobs[ids[1]]["status"] == "rejected"
+    assert jobs[ids[2]]["date_applied"] == "2024-05-01"
+    stats = logged_in_client.get("/api/jobs/stats").get_json()
+    assert stats["by_status"] == {"rejected": 2, "applied": 1}
+    assert stats["monthly"] == {"2024-05": 1}
+
+def test_jobs_batch_other_users_rows_not_found(app, logged_in_client):
+    from app.models import JobApplication, User
+    eve = User(username="eve", email="eve@x.com", password="x")
+    db.session.add(eve)
+    db.session.flush()
+    job = JobApplication(company="Acme", position="Eng", user_id=eve.id)
+    db.session.add(job)
+    db.session.commit()
+    job_id = job.id
+    resp = logged_in_client.post("/api/jobs/batch", json={"operations": [{"op": "delete", "id": job_id}]})
+    assert resp.get_json()["results"][0]["status"] == "not_found"
+    assert logged_in_client.post("/api/jobs/batch", json={"operations": []}).status_code == 400
+
+def test_jobs_search(app, logged_in_client):
+    from app.models import JobApplication, User
+    from app.search import index_jobs
+    eve = User(username="eve", email="eve@x.com", password="x")
+    db.session.add(eve)
+    db.session.flush()
+    eves = JobApplication(company="Acme Secret", position="Engineer", user_id=eve.id)
+    db.session.add(eves)
+    db.session.flush()
+    index_jobs([eves.id])
+    db.session.commit()
+    for company, position in [("Acme Robotics", "Backend Engineer"), ("Globex", "Data Engineer"),
+                              ("Acme Foods", "Chef"), ("Initech", "Analyst")]:
+        logged_in_client.post("/api/jobs/", json={"company": company, "position": position})
+    logged_in_client.post("/api/jobs/import", data='{"company": "Acme Labs", "position": "Chemist"}\n',
+                          content_type="application/x-ndjson")
+    results = logged_in_client.get("/api/jobs/search?q=acme").get_json()["results"]
+    assert sorted(r["company"] for r in results) == ["Acme Foods", "Acme Labs", "Acme Robotics"]
+    results = logged_in_client.get("/api/jobs/search?q=engin").get_json()["results"]
+    assert {r["position"] for r in results} == {"Backend Engineer", "Data Engineer"}
+    page = logged_in_client.get("/api/jobs/search?q=acme&limit=2").get_json()
+    assert len(page["results"]) == 2 and page["next_offset"] == 2
+    suggestions = logged_in_client.get("/api/jobs/search/suggest?field=company&q=ac").get_json()
+    assert {s["value"] for s in suggestions} == {"Acme Robotics", "Acme Foods", "Acme Labs"}
+    # Suggestions match the start of the value, as on PostgreSQL
+    logged_in_client.post("/api/jobs/", json={"company": "Big Acme", "position": "Dev"})
+    suggestions = logged_in_client.get("/api/jobs/search/suggest?field=company&q=acme%20r").get_json()
+    assert [s["value"] for s in suggestions] == ["Acme Robotics"]
+    suggestions = logged_in_client.get("/api/jobs/search/suggest?field=company&q=acme").get_json()
+    assert "Big Acme" not in {s["value"] for s in suggestions}
+
+    # Updates and deletes keep the index in sync
+    job_id = results[0]["id"]
+    logged_in_client.put(f"/api/jobs/{job_id}", json={"position": "Manager"})
+    assert len(logged_in_client.get("/api/jobs/search?q=engineer").get_json()["results"]) == 1
+    other = [r for r in results if r["id"] != job_id][0]["id"]
+    logged_in_client.post("/api/jobs/batch", json={"operations": [{"op": "delete", "id": other}]})
+    assert logged_in_client.get("/api/jobs/search?q=engineer").get_json()["results"] == []
+
+    assert logged_in_client.get("/api/jobs/search?q=%20").status_code == 400
+    assert logged_in_client.get("/api/jobs/search/suggest?field=password&q=a").status_code == 400
+
+def test_read_replica_routing(tmp_path):
+    from app.models import JobApplication, User
+    primary_uri = f"sqlite:///{tmp_path / 'primary.db'}"
+    replica_uri = f"sqlite:///{tmp_path / 'replica.db'}"
+
+    class ReplicaConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = primary_uri
+        SQLALCHEMY_REPLICA_URIS = [replica_uri]
+        REPLICA_STICKY_SECONDS = 60
+
+    app = create_app(ReplicaConfig)
+    router = app.extensions["replica_router"]
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(router.engines[0])
+    client = app.test_client()
+    client.post("/register", json={"username": "bob", "email": "bob@example.com", "password": "pw"})
+    # Simulate replication of the user row, plus a row only the replica has
+    from sqlalchemy.orm import Session
+    with app.app_context():
+        user = User.query.filter_by(username="bob").first()
+        with Session(router.engines[0]) as replica:
+            replica.add(User(id=user.id, username=user.username, email=user.email, password=user.password))
+            replica.add(JobApplication(company="FromReplica", position="Eng", user_id=user.id))
+            replica.commit()
+
+    fresh = app.test_client()
+    fresh.post("/login", json={"username": "bob", "password": "pw"})
+    # Login was a write, so this client is pinned to the primary
+    assert fresh.get("/api/jobs/").get_json() == []
+    with fresh.session_transaction() as sess:
+        sess.pop("_db_primary_until")
+    assert [j["company"] for j in fresh.get("/api/jobs/").get_json()] == ["FromReplica"]
+    assert router.replica_reads >= 1
+
+    # An unhealthy replica falls back to the primary
+    import sqlalchemy
+    router.engines[0] = sqlalchemy.create_engine("sqlite:////nonexistent/dir/replica.db")
+    router._health = {id(router.engines[0]): (True, 0.0)}
+    assert fresh.get("/api/jobs/").get_json() == []
+    assert router.fallbacks >= 1
+
+from contextlib import contextmanager
+
+@contextmanager
+def assert_max_queries(limit):
+    """Fail if the block runs more than ``limit`` SQL statements."""
+    from app.metrics import QueryCounter
+    with QueryCounter() as counter:
+        yield counter
+    assert counter.count <= limit, (
+        f"{counter.count} queries (max {limit}):\n" + "\n".join(counter.statements))
+
+def test_endpoint_query_budgets(logged_in_client):
+    for i in range(30):
+        logged_in_client.post("/api/jobs/", json={"company": f"Co{i}", "position": "Eng"})
+    with assert_max_queries(3):
+        assert len(logged_in_client.get("/api/jobs/").get_json()) == 30
+    with assert_max_queries(3):
+        logged_in_client.get("/api/jobs/stats")
+    with assert_max_queries(6):
+        logged_in_client.get("/api/jobs/search?q=co")
+    ids = [j["id"] for j in logged_in_client.get("/api/jobs/").get_json()]
+    with assert_max_queries(9):
+        logged_in_client.post("/api/jobs/batch", json={"operations": [
+            {"op": "update", "id": i, "fields": {"status": "rejected"}} for i in ids[:20]
+        ] + [{"op": "delete", "id": i} for i in ids[20:]]})
+
+def test_metrics_endpoint(app, logged_in_client):
+    app.config["METRICS_SERVER_TIMING"] = True
+    resp = logged_in_client.get("/api/jobs/")
+    assert 'db;dur=' in resp.headers["Server-Timing"]
+    body = logged_in_client.get("/metrics").get_data(as_text=True)
+    assert 'http_request_duration_seconds_count{endpoint="jobs.get_jobs",method="GET",status="200"} 1' in body
+    assert 'db_queries_per_request_bucket{endpoint="jobs.get_jobs",le="+Inf"} 1' in body
+    assert 'password_hash_duration_seconds_count{op="hash"} 1' in body
+    # Production requires a token; without one the endpoint is not served
+    app.config["METRICS_REQUIRE_TOKEN"] = True
+    assert logged_in_client.get("/metrics").status_code == 404
+    app.config["METRICS_TOKEN"] = "s3cret"
+    assert logged_in_client.get("/metrics").status_code == 401
+    assert logged_in_client.get("/metrics", headers={"Authorization": "Bearer s3cret"}).status_code == 200
+
+def test_slow_query_counter(app, logged_in_client):
+    app.config["SQL_SLOW_QUERY_SECONDS"] = 0.0
+    logged_in_client.get("/api/jobs/")
+    assert app.extensions["metrics"].slow_queries.value(endpoint="jobs.get_jobs") >= 1
+
+def test_benchmark_harness_smoke(tmp_path):
+    from bench.app import bench_config
+    from bench.harness import TestClientTransport, compare, run_scenarios
+    from bench.seed import seed_database
+    db_path = str(tmp_path / "bench.sqlite3")
+    seed_database(db_path, users=5, jobs=200, heavy_user_jobs=50)
+    app = create_app(bench_config(db_path, PASSWORD_HASH_METHOD="pbkdf2:sha256:1000",
+                                  PASSWORD_HASH_WORKERS=0))
+    results = run_scenarios(lambda: TestClientTransport(app), list(range(1, 51)), 4, 1)
+    assert all(r["errors"] == 0 and r["count"] >= 1 for r in results.values()), results
+    report = {"results": {"testclient": results}}
+    assert compare(report, report, 0.2) == []
+    slower = {"results": {"testclient": {name: dict(r, p95_ms=r["p95_ms"] * 2 + 1)
+                                         for name, r in results.items()}}}
+    assert compare(slower, report, 0.2)
+
+def test_jobs_fields_projection(logged_in_client):
+    for i in range(3):
+        logged_in_client.post("/api/jobs/", json={"company": f"Co{i}", "position": "Eng",
+                                                  "date_applied": f"2024-01-0{i + 1}"})
+    jobs = logged_in_client.get("/api/jobs/?fields=company,date_applied&sort=-date_applied&limit=2")
+    assert jobs.get_json() == [{"company": "Co2", "date_applied": "2024-01-03"},
+                               {"company": "Co1", "date_applied": "2024-01-02"}]
+    cursor = jobs.headers["X-Next-Cursor"]
+    rest = logged_in_client.get(f"/api/jobs/?fields=company,date_applied&sort=-date_applied&limit=2&cursor={cursor}")
+    assert rest.get_json() == [{"company": "Co0", "date_applied": "2024-01-01"}]
+    results = logged_in_client.get("/api/jobs/search?q=co1&fields=id,status").get_json()["results"]
+    assert set(results[0]) == {"id", "status", "rank"}
+    assert logged_in_client.get("/api/jobs/?fields=password").status_code == 400
+
+def test_fast_json_provider_matches_stdlib(app, monkeypatch):
+    from datetime import date
+    import json
+    from app import serializers
+    provider = serializers.FastJSONProvider(app)
+    payload = {"b": [1, 2.5, None], "a": "é", "d": date(2024, 1, 2)}
+    fast = json.loads(provider.response(payload).get_data())
+    monkeypatch.setattr(serializers, "orjson", None)
+    slow = json.loads(provider.response(payload).get_data())
+    assert fast == slow and fast["a"] == "é"
+    assert provider.dumps({"x": 1}).replace(" ", "") == '{"x":1}'
+    assert serializers.dumps_line({"x": 1}) == '{"x":1}'
+
+def test_reset_after_fork_disposes_pools(tmp_path):
+    from app import reset_after_fork
+
+    class FileConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'fork.db'}"
+
+    app = create_app(FileConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.execute(db.select(1))
+        engine = db.engine
+        pool_before = engine.pool
+        db.session.remove()
+    reset_after_fork(app)
+    assert engine.pool is not pool_before
+
+def test_response_compression(app, logged_in_client):
+    import gzip, zlib
+    for i in range(40):
+        logged_in_client.post("/api/jobs/", json={"company": f"Company {i}", "position": "Engineer"})
+    plain = logged_in_client.get("/api/jobs/")
+    assert "Content-Encoding" not in plain.headers
+    resp = logged_in_client.get("/api/jobs/", headers={"Accept-Encoding": "gzip, deflate"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in resp.headers["Vary"]
+    assert gzip.decompress(resp.get_data()) == plain.get_data()
+    assert resp.headers["ETag"] == "W/" + plain.headers["ETag"]
+    # The weak tag still validates
+    again = logged_in_client.get("/api/jobs/", headers={
+        "Accept-Encoding": "gzip", "If-None-Match": resp.headers["ETag"]})
+    assert again.status_code == 304
+    resp = logged_in_client.get("/api/jobs/", headers={"Accept-Encoding": "deflate"})
+    assert zlib.decompress(resp.get_data()) == plain.get_data()
+    # Small bodies are sent as-is
+    small = logged_in_client.get("/api/me", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in small.headers
+
+def test_streamed_export_compressed_per_chunk(app, logged_in_client):
+    import gzip
+    app.config["JOBS_EXPORT_CHUNK_SIZE"] = 5
+    for i in range(20):
+        logged_in_client.post("/api/jobs/", json={"company": f"Co{i}", "position": "Eng"})
+    plain = logged_in_client.get("/api/jobs/export?format=ndjson").get_data()
+    resp = logged_in_client.get("/api/jobs/export?format=ndjson", headers={"Accept-Encoding": "gzip"},
+                                buffered=False)
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in resp.headers
+    chunks = list(resp.response)
+    assert len(chunks) > 2
+    assert gzip.decompress(b"".join(chunks)) == plain
+
+def test_jobs_change_feed(logged_in_client):
+    feed = logged_in_client.get("/api/jobs/changes").get_json()
+    assert feed["changes"] == [] and not feed["has_more"]
+    start = feed["cursor"]
+    a = logged_in_client.post("/api/jobs/", json={"company": "A", "position": "Eng"}).get_json()["id"]
+    b = logged_in_client.post("/api/jobs/", json={"company": "B", "position": "Eng"}).get_json()["id"]
+    c = logged_in_client.post("/api/jobs/", json={"company": "C", "position": "Eng"}).get_json()["id"]
+    logged_in_client.put(f"/api/jobs/{a}", json={"status": "interview"})
+    logged_in_client.delete(f"/api/jobs/{b}")
+    logged_in_client.post("/api/jobs/batch", json={"operations": [{"op": "delete", "id": c}]})
+
+    changes, cursor = [], start
+    while True:
+        page = logged_in_client.get(f"/api/jobs/changes?since={cursor}&limit=1").get_json()
+        changes += page["changes"]
+        cursor = page["cursor"]
+        if not page["has_more"]:
+            break
+    assert [(ch["op"], ch.get("id") or ch["job"]["id"]) for ch in changes] == [
+        ("upsert", a), ("delete", b), ("delete", c)]
+    assert changes[0]["job"]["status"] == "interview"
+    seqs = [ch["change_seq"] for ch in changes]
+    assert seqs == sorted(seqs)
+    # Nothing new since the last cursor
+    assert logged_in_client.get(f"/api/jobs/changes?since={cursor}").get_json()["changes"] == []
+    assert logged_in_client.get("/api/jobs/changes?since=abc").status_code == 400
+
+def test_tombstone_compaction_expires_old_cursors(app, logged_in_client):
+    from datetime import timedelta
+    from app.changes import compact_tombstones
+    from app.models import JobTombstone
+    a, d = [logged_in_client.post("/api/jobs/", json={"company": c, "position": "Eng"}).get_json()["id"]
+            for c in ("A", "D")]
+    stale = logged_in_client.get("/api/jobs/changes").get_json()["cursor"]
+    logged_in_client.post("/api/jobs/", json={"company": "B", "position": "Eng"})
+    logged_in_client.post("/api/jobs/batch", json={"operations": [{"op": "delete", "id": a},
+                                                                 {"op": "delete", "id": d}]})
+    # A client that stopped halfway through the batch delete
+    mid_batch = logged_in_client.get(f"/api/jobs/changes?since={stale}&limit=2").get_json()["cursor"]
+    logged_in_client.post("/api/jobs/", json={"company": "C", "position": "Eng"})
+    latest = logged_in_client.get("/api/jobs/changes").get_json()["cursor"]
+    assert compact_tombstones(timedelta(days=30)) == 0
+    assert compact_tombstones(timedelta(days=-1)) == 2
+    assert JobTombstone.query.count() == 0
+    resp = logged_in_client.get(f"/api/jobs/changes?since={stale}")
+    assert resp.status_code == 410 and resp.get_json()["reset"] is True
+    assert logged_in_client.get(f"/api/jobs/changes?since={mid_batch}").status_code == 410
+    # The reset cursor (and no cursor at all) is a full snapshot that still works
+    snapshot = logged_in_client.get(f"/api/jobs/changes?since={resp.get_json()['cursor']}")
+    assert snapshot.status_code == 200
+    assert [c["job"]["company"] for c in snapshot.get_json()["changes"]] == ["B", "C"]
+    assert logged_in_client.get("/api/jobs/changes").status_code == 200
+    assert logged_in_client.get(f"/api/jobs/changes?since={latest}").status_code == 200
+
+def test_startup_profile_records_phases(app):
+    profile = app.extensions['startup_profile']
+    names = [name for name, _ in profile.phases]
+    assert names[0] == 'import app package'
+    assert 'blueprints' in names
+    assert profile.total > 0
+    assert 'total' in profile.report()
+
+def test_ensure_schema_only_runs_when_version_changes(app):
+    from app.schema import SCHEMA_VERSION, ensure_schema, stored_schema_version
+    assert ensure_schema() is True
+    assert stored_schema_version() == SCHEMA_VERSION
+    assert ensure_schema() is False
+
+def test_cold_start_budget():
+    """Fresh interpreter: import the app package and run create_app."""
+    import os
+    import subprocess
+    import sys
+    budget = float(os.getenv('COLD_START_BUDGET_SECONDS', '1.5'))
+    script = (
+        'import time; t = time.perf_counter(); '
+        'from app import create_app; from config import TestingConfig; '
+        'create_app(TestingConfig); print(time.perf_counter() - t)'
+    )
+    timings = []
+    for _ in range(3):
+        out = subprocess.run([sys.executable, '-c', script], capture_output=True,
+                             text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        timings.append(float(out.stdout.strip().splitlines()[-1]))
+    assert min(timings) < budget, f'cold start {min(timings):.3f}s exceeds {budget}s'
+
+def test_admission_sheds_expensive_routes_before_reads(app, logged_in_client):
+    controller = app.extensions['admission']
+    controller.observe_checkout(1.0)  # moving average ~0.2s: over the expensive budget, under the read one
+    resp = logged_in_client.post("/login", json={"username": "bob", "password": "pw456"})
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == "1"
+    assert logged_in_client.get("/api/jobs/").status_code == 200
+    assert controller.shed.value(route_class="expensive", reason="pool_wait") == 1
+    assert 'admission_shed_total{reason="pool_wait",route_class="expensive"} 1' in \
+        logged_in_client.get("/metrics").get_data(as_text=True)
+
+def test_admission_in_flight_limit(app, logged_in_client):
+    controller = app.extensions['admission']
+    controller.max_in_flight = dict(controller.max_in_flight, read=1)
+    assert controller.try_acquire('read') is None  # another request holds the only slot
+    resp = logged_in_client.get("/api/me")
+    assert resp.status_code == 503
+    assert controller.shed.value(route_class="read", reason="in_flight") == 1
+    controller.release('read')
+    assert logged_in_client.get("/api/me").status_code == 200
+    assert controller.in_flight['read'] == 0
+
+def _sharded_app(tmp_path, shards):
+    config = type('ShardedConfig', (TestingConfig,), {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'primary.sqlite3'}",
+        'SQLALCHEMY_SHARD_URIS': [f"sqlite:///{tmp_path / f'shard{i}.sqlite3'}" for i in range(shards)],
+    })
+    return create_app(config)
+
+def _add_user_with_jobs(app, name, jobs):
+    client = app.test_client()
+    client.post("/register", json={"username": name, "email": f"{name}@example.com", "password": "pw"})
+    client.post("/login", json={"username": name, "password": "pw"})
+    for i in range(jobs):
+        assert client.post("/api/jobs/", json={"company": f"{name} co {i}", "position": "Dev"}).status_code == 201
+    return client
+
+def _job_owners(engine):
+    from sqlalchemy import text
+    with engine.connect() as conn:
+        return dict(conn.execute(text("SELECT id, user_id FROM job_application")).all())
+
+def test_sharding_routes_jobs_to_user_shard(tmp_path):
+    from app.schema import ensure_schema
+    app = _sharded_app(tmp_path, 3)
+    with app.app_context():
+        ensure_schema()
+    clients = {name: _add_user_with_jobs(app, name, 2) for name in ("ann", "ben", "cat", "dan")}
+    router = app.extensions['shard_router']
+    with app.app_context():
+        assert _job_owners(db.engine) == {}  # nothing on the primary
+        placed = [(uid, i) for i, engine in enumerate(router.engines) for uid in _job_owners(engine).values()]
+    assert len(placed) == 8
+    assert all(router.shard_for(uid) == i for uid, i in placed)
+    assert len({job_id for engine in router.engines for job_id in _job_owners(engine)}) == 8
+
+    client = clients["cat"]
+    jobs = client.get("/api/jobs/").get_json()
+    assert [j["company"] for j in jobs] == ["cat co 0", "cat co 1"]
+    assert len(client.get("/api/jobs/search?q=cat").get_json()["results"]) == 2
+    assert client.get("/api/jobs/stats").get_json()["total"] == 2
+    assert client.delete(f"/api/jobs/{jobs[0]['id']}").status_code == 200
+    assert [c["op"] for c in client.get("/api/jobs/changes").get_json()["changes"]] == ["upsert", "delete"]
+
+def test_rebalance_shards_moves_users_and_keeps_ids(tmp_path):
+    from app.schema import ensure_schema
+    from app.sharding import rebalance_shards
+    # Start unsharded, then spread over two shards, then grow to three
+    unsharded = _sharded_app(tmp_path, 0)
+    with unsharded.app_context():
+        ensure_schema()
+    names = [f"user{i}" for i in range(8)]
+    for name in names:
+        # user7's ids run past SHARD_ID_STRIDE; the other shard never sees them
+        _add_user_with_jobs(unsharded, name, 20 if name == "user7" else 2)
+    with unsharded.app_context():
+        before = _job_owners(db.engine)
+
+    for shards, from_primary in ((2, True), (3, False)):
+        app = _sharded_app(tmp_path, shards)
+        with app.app_context():
+            rebalance_shards(from_primary=from_primary)
+            router = app.extensions['shard_router']
+            assert _job_owners(db.engine) == {}
+            after = {}
+            for i, engine in enumerate(router.engines):
+                owners = _job_owners(engine)
+                assert all(router.shard_for(uid) == i for uid in owners.values())
+                after.update(owners)
+        assert after == before
+
+    new_ids = []
+    for name in names:
+        client = app.test_client()
+        client.post("/login", json={"username": name, "password": "pw"})
+        assert len(client.get(f"/api/jobs/search?q={name}").get_json()["results"]) == (20 if name == "user7" else 2)
+        new_ids.append(client.post("/api/jobs/", json={"company": "Later", "position": "Dev"}).get_json()["id"])
+        assert [j["company"] for j in client.get("/api/jobs/").get_json()][-1] == "Later"
+    # Every shard allocates above the primary's ids, not just the shards users moved to
+    assert len(set(new_ids)) == len(names)
+    assert min(new_ids) > max(before)
+
+def test_resume_upload_dedup_and_download(app, logged_in_client, tmp_path):
+    import hashlib
+    from app.models import ResumeBlob
+    from app.resumes import LocalFileStorage
+    storage = app.extensions['resume_storage'] = LocalFileStorage(tmp_path)
+    pdf = b"%PDF-1.4 " + b"x" * 5000
+    digest = hashlib.sha256(pdf).hexdigest()
+    ids = [logged_in_client.post("/api/jobs/", json={"company": c, "position": "Dev", "resume_used": "cv.pdf"})
+           .get_json()["id"] for c in ("A", "B", "C")]
+
+    resp = logged_in_client.put(f"/api/jobs/{ids[0]}/resume", data=pdf, content_type="application/pdf")
+    assert resp.status_code == 200 and resp.get_json()["sha256"] == digest
+    assert logged_in_client.put(f"/api/jobs/{ids[1]}/resume", data=pdf,
+                                content_type="application/pdf").status_code == 200
+    assert logged_in_client.put(f"/api/jobs/{ids[2]}/resume", json={"sha256": digest}).status_code == 200
+    assert db.session.get(ResumeBlob, digest).ref_count == 3
+    assert [name for name, _ in storage.stored()] == [digest]  # stored once
+    assert logged_in_client.put(f"/api/jobs/{ids[0]}/resume", data=b"x",
+                                content_type="image/png").status_code == 415
+
+    resp = logged_in_client.get(f"/api/jobs/{ids[1]}/resume", headers={"Accept-Encoding": "gzip"})
+    assert resp.status_code == 200 and resp.data == pdf
+    assert resp.headers["ETag"] == f'"{digest}"' and "Content-Encoding" not in resp.headers
+    assert logged_in_client.get(f"/api/jobs/{ids[1]}/resume",
+                                headers={"If-None-Match": f'"{digest}"'}).status_code == 304
+    resp = logged_in_client.get(f"/api/jobs/{ids[1]}/resume", headers={"Range": "bytes=0-7"})
+    assert resp.status_code == 206 and resp.data == pdf[:8]
+
+def test_resume_references_and_gc(app, logged_in_client, tmp_path):
+    import os
+    import time
+    from datetime import timedelta
+    from app.models import ResumeBlob
+    from app.resumes import LocalFileStorage, collect_garbage
+    storage = app.extensions['resume_storage'] = LocalFileStorage(tmp_path)
+    ids = [logged_in_client.post("/api/jobs/", json={"company": c, "position": "Dev"}).get_json()["id"]
+           for c in ("A", "B")]
+    digest = None
+    for job_id in ids:
+        digest = logged_in_client.put(f"/api/jobs/{job_id}/resume", data=b"resume text",
+                                      content_type="text/plain").get_json()["sha256"]
+    assert logged_in_client.delete(f"/api/jobs/{ids[0]}/resume").status_code == 200
+    logged_in_client.post("/api/jobs/batch", json={"operations": [{"op": "delete", "id": ids[1]}]})
+    assert db.session.get(ResumeBlob, digest).ref_count == 0
+
+    assert collect_garbage(timedelta(hours=1)) == 0  # still within the grace period
+    blob = db.session.get(ResumeBlob, digest)
+    blob.updated_at -= timedelta(hours=2)
+    db.session.commit()
+    past = time.time() - 7200
+    os.utime(storage.path(digest), (past, past))
+    assert collect_garbage(timedelta(hours=1)) == 1
+    assert db.session.get(ResumeBlob, digest) is None
+    assert list(storage.stored()) == []
+
+def test_ensure_schema_migrates_baseline_database(tmp_path):
+    import sqlite3
+    from werkzeug.security import generate_password_hash
+    from app.schema import SCHEMA_VERSION, ensure_schema, stored_schema_version
+    path = tmp_path / "legacy.sqlite3"
+    # Schema and data as created by the first release (no schema_version table)
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE user (id INTEGER PRIMARY KEY, username VARCHAR(150) NOT NULL UNIQUE,
+                           email VARCHAR(150) NOT NULL UNIQUE, password VARCHAR(256) NOT NULL);
+        CREATE TABLE job_application (id INTEGER PRIMARY KEY, company VARCHAR(150) NOT NULL,
+                                      position VARCHAR(150) NOT NULL, resume_used VARCHAR(256),
+                                      date_applied DATE, status VARCHAR(50),
+                                      user_id INTEGER NOT NULL REFERENCES user (id));
+    """)
+    conn.execute("INSERT INTO user VALUES (1, 'old', 'old@example.com', ?)",
+                 (generate_password_hash("pw", method="pbkdf2:sha256:1000"),))
+    conn.execute("INSERT INTO job_application VALUES (1, 'Acme', 'Dev', NULL, '2024-01-02', 'applied', 1)")
+    conn.commit()
+    conn.close()
+
+    config = type('LegacyConfig', (TestingConfig,), {'SQLALCHEMY_DATABASE_URI': f"sqlite:///{path}"})
+    app = create_app(config)
+    with app.app_context():
+        assert ensure_schema() is True
+        assert stored_schema_version() == SCHEMA_VERSION
+        assert ensure_schema() is False
+    client = app.test_client()
+    assert client.post("/login", json={"username": "old", "password": "pw"}).status_code == 200
+    assert client.get("/api/jobs/").get_json()[0]["company"] == "Acme"
+    assert client.get("/api/jobs/stats").get_json()["by_status"] == {"applied": 1}
+    assert len(client.get("/api/jobs/search?q=acm").get_json()["results"]) == 1
+    assert client.put("/api/jobs/1", json={"status": "interview"}).status_code == 200
+    assert [c["job"]["status"] for c in client.get("/api/jobs/changes").get_json()["changes"]] == ["interview"]